@@ -0,0 +1,125 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from .config import settings
+from .database import SessionLocal
+from . import metrics, models
+
+logger = logging.getLogger("app.audit")
+
+events_total = metrics.Counter("audit_events_total", "Audit events accepted into the queue", ["action"])
+dropped_total = metrics.Counter("audit_events_dropped_total", "Audit events dropped because the queue was full")
+written_total = metrics.Counter("audit_events_written_total", "Audit events written to the database")
+flush_failures_total = metrics.Counter("audit_flush_failures_total", "Audit batches lost because the insert failed")
+flush_seconds = metrics.Histogram("audit_flush_seconds", "Time spent writing one audit batch")
+
+_STOP = object()
+
+# Запись аудита не должна задерживать запрос: обработчик только кладёт кортеж в ограниченную очередь,
+# а в БД события пишет фоновый поток пачками. При переполнении очереди события отбрасываются со счётчиком
+class AuditLog:
+    def __init__(self, enabled: bool, queue_size: int, batch_size: int, flush_interval: float):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        metrics.Gauge("audit_queue_depth", "Audit events waiting to be written", self._queue.qsize)
+
+    def record(self, action: str, actor_id: Optional[int] = None, subject: Optional[str] = None,
+               ip: Optional[str] = None, **details):
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait((datetime.utcnow(), action, actor_id, subject, ip, details or None))
+        except queue.Full:
+            dropped_total.inc()
+            return
+        events_total.labels(action).inc()
+
+    def _write(self, batch: List[tuple]):
+        rows = [
+            {"created_at": created_at, "action": action, "actor_id": actor_id, "subject": subject, "ip": ip,
+             "details": json.dumps(details, ensure_ascii=False, default=str) if details else None}
+            for created_at, action, actor_id, subject, ip, details in batch
+        ]
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            # executemany: SQLAlchemy собирает строки в многострочные INSERT ... VALUES
+            db.execute(insert(models.AuditEvent), rows)
+            db.commit()
+            written_total.inc(len(rows))
+        except Exception:
+            db.rollback()
+            flush_failures_total.inc()
+            logger.exception("Failed to write %d audit events", len(rows))
+        finally:
+            db.close()
+            flush_seconds.observe(time.monotonic() - started)
+
+    def _run(self):
+        batch: List[tuple] = []
+        stopping = False
+        while not stopping:
+            # Пачка уходит в БД, когда набралось batch_size событий или прошло flush_interval с первого из них
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._write(batch)
+                batch = []
+
+        # Всё, что успели положить до остановки, дописываем
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        # Маркер остановки кладётся блокирующе: при полной очереди поток её как раз разбирает
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Audit writer did not finish in %.0fs, %d events lost", timeout, self._queue.qsize())
+        self._thread = None
+
+def client_ip(request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+audit_log = AuditLog(
+    settings.AUDIT_LOG, settings.AUDIT_QUEUE_SIZE, settings.AUDIT_BATCH_SIZE, settings.AUDIT_FLUSH_SECONDS
+)
@@ -1,57 +1,212 @@
+import secrets
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jose import JWTError
 from .config import settings
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from . import models, database
+from . import models, database, metrics, keys
+from .hashing import pwd_context, password_hasher
+from .user_cache import UserSnapshot, user_cache
+from .revocation import token_denylist
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = HTTPBearer()
 
+login_total = metrics.Counter("auth_login_total", "Login attempts by outcome", ["outcome"])
+rejections_total = metrics.Counter(
+    "auth_rejections_total", "Requests rejected by authentication or authorization", ["status", "source"]
+)
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.now() + expires_delta
+        expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.now() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.setdefault("type", "access")
+    encoded_jwt = keys.encode(to_encode)
     return encoded_jwt
 
-def get_current_user(
-        credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-        db: Session = Depends(database.get_db)
-):
-    credentials_exception = HTTPException(
+def token_claims(user: models.User) -> dict:
+    return {"sub": str(user.id), "role": user.role_id, "ver": user.token_version or 0}
+
+def _create_refresh_token(db: Session, claims: dict, user_id: int, family_id: Optional[str] = None):
+    jti = uuid.uuid4().hex
+    family_id = family_id or jti
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    db.add(models.RefreshToken(jti=jti, family_id=family_id, user_id=user_id, expires_at=expire))
+    token = keys.encode({**claims, "jti": jti, "sid": family_id, "type": "refresh", "exp": expire})
+    return token, jti
+
+def issue_tokens(db: Session, claims: dict, user_id: int, family_id: Optional[str] = None):
+    # sid связывает access-токен с цепочкой refresh-токенов, чтобы logout мог отозвать обе
+    refresh_token, refresh_jti = _create_refresh_token(db, claims, user_id, family_id)
+    access_token = create_access_token({**claims, "sid": family_id or refresh_jti})
+    tokens = {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+    return tokens, refresh_jti
+
+def revoke_refresh_tokens(db: Session, family_id: Optional[str] = None, user_id: Optional[int] = None):
+    query = db.query(models.RefreshToken).filter(models.RefreshToken.revoked_at.is_(None))
+    if family_id is not None:
+        query = query.filter(models.RefreshToken.family_id == family_id)
+    if user_id is not None:
+        query = query.filter(models.RefreshToken.user_id == user_id)
+    query.update({"revoked_at": datetime.utcnow()}, synchronize_session=False)
+
+def revoke_access_token(db: Session, payload: dict):
+    if payload.get("jti"):
+        token_denylist.revoke(db, payload["jti"], payload["exp"])
+
+def rotate_refresh_token(db: Session, token: str) -> dict:
+    payload = decode_token(token, expected_type="refresh")
+    stored = db.get(models.RefreshToken, payload.get("jti"))
+    if stored is None or stored.expires_at < datetime.utcnow():
+        raise _credentials_exception()
+    # Токен помечается обменянным условным UPDATE: из двух одновременных обменов строку получит
+    # только один (в PostgreSQL второй UPDATE ждёт блокировку строки и уже не находит revoked_at IS NULL)
+    claimed = db.query(models.RefreshToken).filter(
+        models.RefreshToken.jti == stored.jti, models.RefreshToken.revoked_at.is_(None)
+    ).update({"revoked_at": datetime.utcnow()}, synchronize_session=False)
+    if not claimed:
+        # Повторное использование уже обменянного токена — отзываем всю цепочку
+        revoke_refresh_tokens(db, family_id=stored.family_id)
+        db.commit()
+        raise _credentials_exception()
+
+    snapshot = load_user_snapshot(db, stored.user_id)
+    if snapshot is None or not snapshot.is_active or snapshot.version != payload.get("ver"):
+        raise _credentials_exception()
+
+    claims = {"sub": str(snapshot.id), "role": snapshot.role_id, "ver": snapshot.version}
+    tokens, refresh_jti = issue_tokens(db, claims, snapshot.id, family_id=stored.family_id)
+    stored.replaced_by = refresh_jti
+    return tokens
+
+def bump_token_version(user: models.User):
+    # Старые токены перестают проходить проверку версии; кэш чистится после commit
+    user.token_version = (user.token_version or 0) + 1
+
+def _credentials_exception():
+    rejections_total.labels("401", "get_current_user").inc()
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token = credentials.credentials
+
+def decode_token(token: str, expected_type: str = "access") -> dict:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = keys.decode(token)
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("type", "access") != expected_type:
+        raise _credentials_exception()
+    return payload
+
+def _check_not_revoked(db: Session, payload: dict):
+    token_denylist.ensure_fresh(db)
+    jti = payload.get("jti")
+    if jti and token_denylist.contains(jti):
+        raise _credentials_exception()
+
+def get_current_user(
+        credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+        db: Session = Depends(database.get_db)
+):
+    payload = decode_token(credentials.credentials)
+    _check_not_revoked(db, payload)
 
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    user = db.query(models.User).filter(models.User.id == int(payload["sub"])).first()
     if user is None or not user.is_active:
-        raise credentials_exception
+        raise _credentials_exception()
+    if "ver" in payload and payload["ver"] != (user.token_version or 0):
+        raise _credentials_exception()
     return user
 
+def load_user_snapshot(db: Session, user_id: int) -> Optional[UserSnapshot]:
+    row = db.query(
+        models.User.id, models.User.role_id, models.User.is_active, models.User.token_version, models.User.updated_at
+    ).filter(models.User.id == user_id).first()
+    if row is None:
+        return None
+    return UserSnapshot(
+        id=row.id, role_id=row.role_id, is_active=row.is_active, version=row.token_version or 0,
+        updated_at=row.updated_at
+    )
+
+# Лёгкая проверка токена для проверок прав: при TOKEN_FAST_PATH БД читается только при промахе кэша
+def get_current_principal(
+        credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+        db: Session = Depends(database.get_db)
+):
+    if not settings.TOKEN_FAST_PATH:
+        return get_current_user(credentials, db)
+
+    payload = decode_token(credentials.credentials)
+    if "ver" not in payload:
+        return get_current_user(credentials, db)
+    _check_not_revoked(db, payload)
+
+    user_id = int(payload["sub"])
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        snapshot = load_user_snapshot(db, user_id)
+        if snapshot is None:
+            raise _credentials_exception()
+        user_cache.put(snapshot)
+
+    if not snapshot.is_active or snapshot.version != payload["ver"] or snapshot.role_id != payload.get("role"):
+        raise _credentials_exception()
+    return snapshot
+
+_dummy_hash: Optional[str] = None
+
+# Хэш для входа с несуществующим email считается при старте воркера (lifespan), иначе первый
+# такой вход стоил бы два хэширования и отличался бы по времени от входа с существующим email
+def prime_dummy_hash():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context.hash(secrets.token_urlsafe(16))
+
+def _get_dummy_hash() -> str:
+    if _dummy_hash is None:
+        prime_dummy_hash()
+    return _dummy_hash
+
 def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+    user = db.query(
+        models.User.id, models.User.hashed_password, models.User.is_active,
+        models.User.role_id, models.User.token_version
+    ).filter(func.lower(models.User.email) == email.lower()).first()
+
+    # Ровно одна проверка хэша на попытку, даже если пользователя нет:
+    # время ответа не выдаёт существование аккаунта
+    if not user:
+        verify_password(password, _get_dummy_hash())
         return False
-    return user
\ No newline at end of file
+
+    password_ok, new_hash = password_hasher.verify_and_update(password, user.hashed_password)
+    if not password_ok or not user.is_active:
+        return False
+
+    if new_hash:
+        # Хэш устаревшей схемы или стоимости пересчитывается при успешном входе
+        db.query(models.User).filter(models.User.id == user.id).update(
+            {"hashed_password": new_hash}, synchronize_session=False
+        )
+        db.commit()
+    return user
@@ -0,0 +1,229 @@
+import csv
+import io
+from typing import Dict, List, Set
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+RULE_FIELDS = [
+    "read_permission", "read_all_permission", "create_permission",
+    "update_permission", "update_all_permission", "delete_permission", "delete_all_permission",
+]
+
+USER_IMPORT_COLUMNS = [
+    "email", "hashed_password", "first_name", "last_name", "middle_name", "role_id", "is_active", "created_at",
+]
+USERS_PER_STATEMENT = 1000
+
+# 9 колонок на правило: 1000 строк укладываются в лимит параметров и SQLite, и PostgreSQL
+RULES_PER_STATEMENT = 1000
+
+def _dialect_insert(db: Session, model):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
+
+def _reject_if_invalid(errors: Dict[int, str], total: int):
+    if not errors:
+        return
+    results = [
+        schemas.BulkItemResult(index=i, status="error" if i in errors else "skipped", detail=errors.get(i))
+        for i in range(total)
+    ]
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=[result.model_dump() for result in results]
+    )
+
+def _check_unique_names(items) -> Dict[int, str]:
+    errors = {}
+    seen = set()
+    for i, item in enumerate(items):
+        if not item.name:
+            errors[i] = "Name is required"
+        elif item.name in seen:
+            errors[i] = "Duplicate name in batch"
+        seen.add(item.name)
+    return errors
+
+def _upsert_by_name(db: Session, model, items) -> List[schemas.BulkItemResult]:
+    _reject_if_invalid(_check_unique_names(items), len(items))
+    if not items:
+        return []
+
+    names = [item.name for item in items]
+    existing = {name for (name,) in db.query(model.name).filter(model.name.in_(names)).all()}
+
+    stmt = _dialect_insert(db, model).values([item.model_dump() for item in items])
+    set_ = {"description": stmt.excluded.description}
+    if "updated_at" in model.__table__.c:
+        # onupdate не срабатывает для ON CONFLICT DO UPDATE, отметку переносим явно
+        set_["updated_at"] = stmt.excluded.updated_at
+    stmt = stmt.on_conflict_do_update(index_elements=[model.name], set_=set_).returning(model.id, model.name)
+    ids = {name: row_id for row_id, name in db.execute(stmt).all()}
+
+    return [
+        schemas.BulkItemResult(
+            index=i, id=ids[item.name], status="updated" if item.name in existing else "created"
+        )
+        for i, item in enumerate(items)
+    ]
+
+def upsert_roles(db: Session, items: List[schemas.RoleCreate]) -> List[schemas.BulkItemResult]:
+    return _upsert_by_name(db, models.Role, items)
+
+def upsert_business_elements(db: Session, items: List[schemas.BusinessElementCreate]) -> List[schemas.BulkItemResult]:
+    return _upsert_by_name(db, models.BusinessElement, items)
+
+def upsert_access_rules(db: Session, items: List[schemas.AccessRuleCreate]) -> List[schemas.BulkItemResult]:
+    if not items:
+        return []
+
+    role_ids = {item.role_id for item in items}
+    element_ids = {item.business_element_id for item in items}
+    known_roles = {row_id for (row_id,) in db.query(models.Role.id).filter(models.Role.id.in_(role_ids)).all()}
+    known_elements = {
+        row_id for (row_id,) in db.query(models.BusinessElement.id).filter(
+            models.BusinessElement.id.in_(element_ids)
+        ).all()
+    }
+
+    errors = {}
+    seen = set()
+    for i, item in enumerate(items):
+        key = (item.role_id, item.business_element_id)
+        if item.role_id not in known_roles:
+            errors[i] = "Role not found"
+        elif item.business_element_id not in known_elements:
+            errors[i] = "Business element not found"
+        elif key in seen:
+            errors[i] = "Duplicate rule in batch"
+        seen.add(key)
+    _reject_if_invalid(errors, len(items))
+
+    existing = {
+        (role_id, element_id) for role_id, element_id in db.query(
+            models.AccessRoleRule.role_id, models.AccessRoleRule.business_element_id
+        ).filter(
+            models.AccessRoleRule.role_id.in_(role_ids),
+            models.AccessRoleRule.business_element_id.in_(element_ids)
+        ).all()
+    }
+
+    # Опирается на уникальный индекс (role_id, business_element_id)
+    ids = {}
+    for start in range(0, len(items), RULES_PER_STATEMENT):
+        chunk = items[start:start + RULES_PER_STATEMENT]
+        stmt = _dialect_insert(db, models.AccessRoleRule).values([item.model_dump() for item in chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.AccessRoleRule.role_id, models.AccessRoleRule.business_element_id],
+            set_={field: stmt.excluded[field] for field in RULE_FIELDS + ["updated_at"]}
+        ).returning(models.AccessRoleRule.id, models.AccessRoleRule.role_id, models.AccessRoleRule.business_element_id)
+        for rule_id, role_id, element_id in db.execute(stmt).all():
+            ids[(role_id, element_id)] = rule_id
+
+    return [
+        schemas.BulkItemResult(
+            index=i,
+            id=ids[(item.role_id, item.business_element_id)],
+            status="updated" if (item.role_id, item.business_element_id) in existing else "created"
+        )
+        for i, item in enumerate(items)
+    ]
+
+def delete_access_rules(db: Session, ids: List[int]) -> List[schemas.BulkItemResult]:
+    if not ids:
+        return []
+    deleted = {
+        rule_id for (rule_id,) in db.execute(
+            delete(models.AccessRoleRule).where(models.AccessRoleRule.id.in_(ids)).returning(models.AccessRoleRule.id)
+        ).all()
+    }
+    return [
+        schemas.BulkItemResult(
+            index=i,
+            id=rule_id,
+            status="deleted" if rule_id in deleted else "not_found"
+        )
+        for i, rule_id in enumerate(ids)
+    ]
+
+def _copy_users(db: Session, rows: List[dict]) -> Set[str]:
+    # COPY не поддерживает ON CONFLICT: пачка грузится во временную таблицу
+    # и переносится в users одним INSERT .. SELECT, конфликтующие строки пропускаются.
+    # Таблица живёт до конца транзакции, TRUNCATE убирает строки прошлой пачки той же транзакции
+    columns = ", ".join(USER_IMPORT_COLUMNS)
+    cursor = db.connection().connection.cursor()
+    cursor.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS users_import (email text, hashed_password text, first_name text, "
+        "last_name text, middle_name text, role_id integer, is_active boolean, created_at timestamp) "
+        "ON COMMIT DROP"
+    )
+    cursor.execute("TRUNCATE users_import")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in USER_IMPORT_COLUMNS])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY users_import ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    # Пустой created_at заполняется так же, как default=datetime.utcnow в модели
+    created_at = "coalesce(created_at, timezone('utc', now()))"
+    values = ", ".join(created_at if column == "created_at" else column for column in USER_IMPORT_COLUMNS)
+    cursor.execute(
+        f"INSERT INTO users ({columns}, token_version, updated_at) SELECT {values}, 0, {created_at} "
+        "FROM users_import ON CONFLICT DO NOTHING RETURNING lower(email)"
+    )
+    return {email for (email,) in cursor.fetchall()}
+
+# Возвращает email (в нижнем регистре) вставленных строк; строки с уже занятым email пропускаются
+def insert_users(db: Session, rows: List[dict]) -> Set[str]:
+    if not rows:
+        return set()
+    if db.get_bind().dialect.name == "postgresql":
+        return _copy_users(db, rows)
+
+    inserted = set()
+    for start in range(0, len(rows), USERS_PER_STATEMENT):
+        stmt = _dialect_insert(db, models.User).values(
+            [{**row, "token_version": 0} for row in rows[start:start + USERS_PER_STATEMENT]]
+        ).on_conflict_do_nothing().returning(models.User.email)
+        inserted.update(email.lower() for (email,) in db.execute(stmt).all())
+    return inserted
+
+# Строки, на которые ещё ссылаются, не удаляются: вся пачка отклоняется с ошибкой по каждой такой строке
+def _delete_unreferenced(db: Session, model, ids: List[int], references) -> List[schemas.BulkItemResult]:
+    if not ids:
+        return []
+    referenced = {}
+    for column, message in references:
+        for (row_id,) in db.query(column).filter(column.in_(ids)).distinct().all():
+            referenced.setdefault(row_id, message)
+    _reject_if_invalid({i: referenced[row_id] for i, row_id in enumerate(ids) if row_id in referenced}, len(ids))
+
+    try:
+        deleted = {
+            row_id for (row_id,) in db.execute(delete(model).where(model.id.in_(ids)).returning(model.id)).all()
+        }
+    except IntegrityError:
+        # Ссылка появилась между проверкой и удалением
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch contains referenced rows")
+    return [
+        schemas.BulkItemResult(index=i, id=row_id, status="deleted" if row_id in deleted else "not_found")
+        for i, row_id in enumerate(ids)
+    ]
+
+def delete_roles(db: Session, ids: List[int]) -> List[schemas.BulkItemResult]:
+    return _delete_unreferenced(db, models.Role, ids, [
+        (models.User.role_id, "Role is assigned to users"),
+        (models.AccessRoleRule.role_id, "Role is used by access rules"),
+    ])
+
+def delete_business_elements(db: Session, ids: List[int]) -> List[schemas.BulkItemResult]:
+    return _delete_unreferenced(db, models.BusinessElement, ids, [
+        (models.AccessRoleRule.business_element_id, "Business element is used by access rules"),
+    ])
@@ -1,15 +1,76 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from .config import settings
+from . import metrics
 
-engine = create_engine(settings.DATABASE_URL)
+pool_checkout_wait_seconds = metrics.Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the pool",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+pool_checkout_timeouts_total = metrics.Counter(
+    "db_pool_checkout_timeouts_total", "Pool checkouts that gave up after DB_POOL_TIMEOUT"
+)
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_checkout_timeouts_total.inc()
+            raise
+        finally:
+            pool_checkout_wait_seconds.observe(time.perf_counter() - started)
+
+def _engine_options():
+    if settings.DATABASE_URL.startswith("sqlite"):
+        return {}
+
+    if settings.DB_PGBOUNCER:
+        # Пулом соединений управляет PgBouncer; параметры запуска сессии он не пропускает
+        return {"poolclass": NullPool}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+if settings.DB_PGBOUNCER and settings.DB_STATEMENT_TIMEOUT_MS and not settings.DATABASE_URL.startswith("sqlite"):
+    # В transaction mode SET действует только внутри транзакции, поэтому ставим его на каждую
+    @event.listens_for(SessionLocal, "after_begin")
+    def _set_statement_timeout(session, transaction, connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+
+def _pool_gauge(method_name):
+    def read():
+        method = getattr(engine.pool, method_name, None)
+        return method() if method else None
+    return read
+
+metrics.Gauge("db_pool_size", "Configured number of persistent connections", _pool_gauge("size"))
+metrics.Gauge("db_pool_checked_in", "Idle connections in the pool", _pool_gauge("checkedin"))
+metrics.Gauge("db_pool_checked_out", "Connections currently in use", _pool_gauge("checkedout"))
+# QueuePool.overflow() отрицателен, пока пул не заполнен до pool_size
+_read_overflow = _pool_gauge("overflow")
+metrics.Gauge("db_pool_overflow", "Connections opened above pool_size", lambda: max(0, _read_overflow() or 0))
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,6 +1,9 @@
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from . import models, database, auth
+from .permissions import permission_matrix
+from .roles import role_registry
 from typing import List
 
 def get_current_active_user(current_user: models.User = Depends(auth.get_current_user)):
@@ -9,31 +12,20 @@ def get_current_active_user(current_user: models.User = Depends(auth.get_current
     return current_user
 
 def check_permission(db: Session, user: models.User, element_name: str, permission_type: str):
-    element = db.query(models.BusinessElement).filter(
-        models.BusinessElement.name == element_name
-    ).first()
-
-    if not element:
-        return False
-
-    rule = db.query(models.AccessRoleRule).filter(
-        models.AccessRoleRule.role_id == user.role_id,
-        models.AccessRoleRule.business_element_id == element.id
-    ).first()
-
-    if not rule:
-        return False
-
-    permission_attr = f"{permission_type}_permission"
-    return getattr(rule, permission_attr, False)
+    permission_matrix.ensure_fresh(db)
+    return permission_matrix.allows(user.role_id, element_name, permission_type)
 
 def require_permission(element_name: str, permission_type: str):
     async def permission_checker(
-            current_user: models.User = Depends(auth.get_current_user),
+            current_user: models.User = Depends(auth.get_current_principal),
             db: Session = Depends(database.get_db)
     ):
-        has_permission = check_permission(db, current_user, element_name, permission_type)
+        # Перестроение матрицы ходит в БД синхронно, поэтому не выполняем его в event loop
+        if permission_matrix.is_stale():
+            await run_in_threadpool(permission_matrix.ensure_fresh, db)
+        has_permission = permission_matrix.allows(current_user.role_id, element_name, permission_type)
         if not has_permission:
+            auth.rejections_total.labels("403", "require_permission").inc()
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
@@ -41,9 +33,10 @@ def require_permission(element_name: str, permission_type: str):
         return current_user
     return permission_checker
 
-def require_admin(db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
-    admin_role = db.query(models.Role).filter(models.Role.name == "admin").first()
-    if not admin_role or current_user.role_id != admin_role.id:
+def require_admin(db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_principal)):
+    admin_role_id = role_registry.get_id(db, "admin")
+    if admin_role_id is None or current_user.role_id != admin_role_id:
+        auth.rejections_total.labels("403", "require_admin").inc()
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges required"
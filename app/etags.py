@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .config import settings
+from . import invalidation, metrics, models
+
+not_modified_total = metrics.Counter(
+    "etag_not_modified_total", "Conditional GETs answered with 304 Not Modified", ["resource"]
+)
+
+# Браузер хранит ответ, но перед использованием обязан спросить сервер с If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def matches(request: Request, etag: str) -> bool:
+    # Для If-None-Match используется слабое сравнение: префикс W/ не учитывается
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(tag) == target for tag in header.split(","))
+
+def not_modified(resource: str, etag: str) -> Response:
+    not_modified_total.labels(resource).inc()
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+def user_etag(user_id: int, updated_at: Optional[datetime]) -> str:
+    return weak_etag("user", user_id, updated_at.isoformat() if updated_at else "")
+
+# Версия таблицы — число строк и максимальный updated_at. Она одинакова во всех воркерах,
+# поэтому ETag не меняется от того, какой воркер ответил. Хранится в памяти до события
+# инвалидации (или TTL), так что повторный опрос без изменений не ходит в БД
+class TableVersion:
+    def __init__(self, model, ttl: float):
+        self.model = model
+        self.ttl = ttl
+        self._version: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl
+
+    def get(self, db: Session) -> str:
+        if not self._is_stale():
+            return self._version
+        with self._lock:
+            if self._is_stale():
+                generation = self._generation
+                count, updated_at = db.query(func.count(self.model.id), func.max(self.model.updated_at)).one()
+                self._version = f"{count}-{updated_at.isoformat() if updated_at else ''}"
+                # Если во время запроса пришла инвалидация, прочитанная версия могла устареть — не кэшируем её
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+            return self._version
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded_at = None
+
+role_versions = TableVersion(models.Role, settings.ETAG_VERSION_TTL)
+rule_versions = TableVersion(models.AccessRoleRule, settings.ETAG_VERSION_TTL)
+
+invalidation.subscribe("role", lambda key, version: role_versions.invalidate())
+invalidation.subscribe("rules", lambda key, version: rule_versions.invalidate())
@@ -0,0 +1,122 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from .config import settings
+from . import metrics
+
+def build_context(schemes=None, bcrypt_rounds=None, argon2_time_cost=None,
+                  argon2_memory_cost=None, argon2_parallelism=None) -> CryptContext:
+    # Первая схема — для новых хэшей, остальные только проверяются и помечаются к обновлению
+    if schemes is None:
+        schemes = [scheme.strip() for scheme in settings.PASSWORD_SCHEMES.split(",") if scheme.strip()]
+    options = {}
+    if "bcrypt" in schemes:
+        rounds = bcrypt_rounds or settings.BCRYPT_ROUNDS
+        options.update(bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+    if "argon2" in schemes:
+        options.update(
+            argon2__type="ID",
+            argon2__time_cost=argon2_time_cost or settings.ARGON2_TIME_COST,
+            argon2__memory_cost=argon2_memory_cost or settings.ARGON2_MEMORY_COST,
+            argon2__parallelism=argon2_parallelism or settings.ARGON2_PARALLELISM,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+pwd_context = build_context()
+
+queue_wait_seconds = metrics.Histogram(
+    "password_hash_queue_wait_seconds", "Time a hashing job waited for a free worker"
+)
+hash_seconds = metrics.Histogram(
+    "password_hash_seconds", "Time spent computing a password hash or verification"
+)
+rejected_total = metrics.Counter(
+    "password_hash_rejected_total", "Hashing jobs rejected because the queue was full"
+)
+
+# Выполняются в дочерних процессах пула, поэтому должны быть функциями верхнего уровня
+def _timed_hash(password):
+    started = time.monotonic()
+    result = pwd_context.hash(password)
+    return result, started, time.monotonic()
+
+def _timed_verify(plain_password, hashed_password):
+    started = time.monotonic()
+    result = pwd_context.verify(plain_password, hashed_password)
+    return result, started, time.monotonic()
+
+def _timed_verify_and_update(plain_password, hashed_password):
+    started = time.monotonic()
+    result = pwd_context.verify_and_update(plain_password, hashed_password)
+    return result, started, time.monotonic()
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.queue_limit:
+                rejected_total.inc()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, try again later",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            result, started, finished = fn(*args)
+            hash_seconds.observe(finished - started)
+            return result
+
+        self._acquire()
+        try:
+            submitted = time.monotonic()
+            result, started, finished = self._get_executor().submit(fn, *args).result()
+        finally:
+            self._release()
+        queue_wait_seconds.observe(max(0.0, started - submitted))
+        hash_seconds.observe(finished - started)
+        return result
+
+    def hash(self, password):
+        return self._run(_timed_hash, password)
+
+    def verify(self, plain_password, hashed_password):
+        return self._run(_timed_verify, plain_password, hashed_password)
+
+    def verify_and_update(self, plain_password, hashed_password):
+        return self._run(_timed_verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from .config import settings
+from . import metrics
+
+logger = logging.getLogger("app.slow_requests")
+
+request_duration_seconds = metrics.Histogram(
+    "http_request_duration_seconds", "Request latency by router", ["router"]
+)
+ROUTERS = ("auth", "users", "admin", "mock", "authz")
+
+class RequestQueryStats:
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def record(self, duration: float, statement: str):
+        self.count += 1
+        self.total += duration
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+class RouteQueryStats:
+    __slots__ = ("requests", "queries", "db_seconds", "max_queries")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.max_queries = 0
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+_routes: Dict[str, RouteQueryStats] = {}
+_routes_lock = threading.Lock()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(time.perf_counter() - started, statement)
+
+def install(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def route_stats():
+    with _routes_lock:
+        return {
+            route: {
+                "requests": stats.requests,
+                "queries": stats.queries,
+                "queries_per_request": round(stats.queries / stats.requests, 2),
+                "db_ms_per_request": round(stats.db_seconds * 1000 / stats.requests, 2),
+                "max_queries": stats.max_queries,
+            }
+            for route, stats in _routes.items()
+        }
+
+def _route_key(scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else '<unmatched>'}"
+
+def _record_route(key: str, stats: RequestQueryStats):
+    with _routes_lock:
+        route = _routes.get(key)
+        if route is None:
+            route = _routes[key] = RouteQueryStats()
+        route.requests += 1
+        route.queries += stats.count
+        route.db_seconds += stats.total
+        route.max_queries = max(route.max_queries, stats.count)
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", '
+                    f'app;dur={elapsed * 1000:.2f}'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            key = _route_key(scope)
+            _record_route(key, stats)
+            if settings.SLOW_REQUEST_MS and elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                logger.warning(
+                    "Slow request %s: %.1fms, %d queries, %.1fms in DB, slowest %.1fms: %s",
+                    key, elapsed * 1000, stats.count, stats.total * 1000,
+                    stats.slowest * 1000, stats.slowest_statement,
+                )
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._histograms = {name: request_duration_seconds.labels(name) for name in ROUTERS}
+        self._other = request_duration_seconds.labels("other")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            path = scope["path"]
+            end = path.find("/", 1)
+            histogram = self._histograms.get(path[1:end] if end != -1 else path[1:], self._other)
+            histogram.observe(time.perf_counter() - started)
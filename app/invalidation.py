@@ -0,0 +1,139 @@
+import json
+import logging
+import select
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from . import metrics
+
+logger = logging.getLogger("app.invalidation")
+
+events_published_total = metrics.Counter(
+    "invalidation_events_published_total", "Cache invalidation events published by this process", ["entity"]
+)
+events_received_total = metrics.Counter(
+    "invalidation_events_received_total", "Cache invalidation events received from other processes", ["entity"]
+)
+listener_reconnects_total = metrics.Counter(
+    "invalidation_listener_reconnects_total", "Times the LISTEN connection was re-established"
+)
+
+# Обработчик получает ключ и версию сущности; key=None означает «сбросить всё»
+Handler = Callable[[Optional[object], Optional[object]], None]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+_source = uuid.uuid4().hex
+
+def subscribe(entity: str, handler: Handler):
+    _handlers[entity].append(handler)
+
+def _dispatch(entity: str, key=None, version=None):
+    for handler in _handlers.get(entity, ()):
+        try:
+            handler(key, version)
+        except Exception:
+            logger.exception("Invalidation handler for %s failed", entity)
+
+def reset_all():
+    for entity in list(_handlers):
+        _dispatch(entity)
+
+def publish(db: Session, entity: str, key=None, version=None):
+    # NOTIFY внутри транзакции доставляется только после commit и пропадает при rollback
+    if db.get_bind().dialect.name == "postgresql":
+        payload = json.dumps({"e": entity, "k": key, "v": version, "src": _source})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                   {"channel": settings.INVALIDATION_CHANNEL, "payload": payload})
+    db.info.setdefault("invalidation_events", []).append((entity, key, version))
+    events_published_total.labels(entity).inc()
+
+# Свой процесс узнаёт об изменениях сразу после commit, не дожидаясь NOTIFY
+@event.listens_for(SessionLocal, "after_commit")
+def _after_commit(session):
+    for entity, key, version in session.info.pop("invalidation_events", ()):
+        _dispatch(entity, key, version)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("invalidation_events", None)
+
+class InvalidationListener:
+    def __init__(self, url: str, channel: str, poll_interval: float = 5.0, max_backoff: float = 30.0):
+        self.url = url
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        # Отдельное соединение мимо пула и PgBouncer: LISTEN держит сессию всё время работы
+        dsn = make_url(self.url).set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = psycopg2.connect(dsn, keepalives=1, keepalives_idle=30, keepalives_interval=10)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _handle(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Malformed invalidation payload: %r", payload)
+            return
+        if message.get("src") == _source:
+            return
+        events_received_total.labels(message["e"]).inc()
+        _dispatch(message["e"], message.get("k"), message.get("v"))
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                connection = self._connect()
+            except Exception as e:
+                logger.warning("Invalidation listener cannot connect: %s", e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            # Пока соединения не было, события могли потеряться — сбрасываем кэши целиком
+            reset_all()
+            backoff = 0.5
+            try:
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._handle(connection.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning("Invalidation listener lost connection: %s", e)
+                listener_reconnects_total.inc()
+            finally:
+                connection.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+def create_listener() -> Optional[InvalidationListener]:
+    # Для SQLite другие процессы не поддерживаются: хватает локальной рассылки после commit
+    url = settings.INVALIDATION_LISTEN_URL or settings.DATABASE_URL
+    if not settings.INVALIDATION_BUS or not url.startswith("postgresql"):
+        return None
+    return InvalidationListener(url, settings.INVALIDATION_CHANNEL)
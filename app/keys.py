@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from .config import settings
+
+KID_FORMAT = "%Y%m%dT%H%M%SZ"
+
+class SigningKey(NamedTuple):
+    kid: str
+    created_at: datetime
+    private: Key
+    public: Key
+
+def is_asymmetric(algorithm: str) -> bool:
+    return not algorithm.startswith("HS")
+
+def _created_at(path: Path) -> datetime:
+    try:
+        return datetime.strptime(path.stem, KID_FORMAT)
+    except ValueError:
+        return datetime.utcfromtimestamp(path.stat().st_mtime)
+
+# Набор ключей подписи из JWT_KEYS_DIR: <kid>.pem с приватным ключом.
+# Подписывает самый новый ключ, опубликованный в JWKS не меньше activation_delay назад,
+# чтобы внешние сервисы успели подтянуть его до появления первых токенов
+class KeyRing:
+    def __init__(self, directory: str, algorithm: str, reload_interval: float, activation_delay: float):
+        self.directory = Path(directory)
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+        self.activation_delay = activation_delay
+        self._keys: Dict[str, SigningKey] = {}
+        self._active: Optional[SigningKey] = None
+        self._jwks: Tuple[bytes, str] = self._build_jwks({})
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.reload_interval
+
+    def _build_jwks(self, keys: Dict[str, SigningKey]) -> Tuple[bytes, str]:
+        body = json.dumps({"keys": [
+            {**key.public.to_dict(), "kid": kid, "use": "sig"} for kid, key in sorted(keys.items())
+        ]}).encode()
+        return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def _reload(self):
+        keys = {}
+        paths = sorted(self.directory.glob("*.pem")) if self.directory.is_dir() else []
+        for path in paths:
+            # PEM разбирается один раз на kid: файл ключа после создания не меняется
+            key = self._keys.get(path.stem)
+            if key is None:
+                private = jwk.construct(path.read_bytes(), self.algorithm)
+                key = SigningKey(path.stem, _created_at(path), private, private.public_key())
+            keys[key.kid] = key
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.activation_delay)
+        by_age = sorted(keys.values(), key=lambda k: k.created_at, reverse=True)
+        active = next((key for key in by_age if key.created_at <= cutoff), by_age[0] if by_age else None)
+
+        self._keys = keys
+        self._active = active
+        self._jwks = self._build_jwks(keys)
+        self._loaded_at = time.monotonic()
+
+    def ensure_fresh(self, force: bool = False):
+        if not force and not self.is_stale():
+            return
+        with self._lock:
+            if force or self.is_stale():
+                self._reload()
+
+    def signing_key(self) -> SigningKey:
+        self.ensure_fresh()
+        if self._active is None:
+            raise RuntimeError(f"No signing keys in {self.directory}; run `python -m app.keys rotate`")
+        return self._active
+
+    def verification_key(self, kid: str) -> Optional[Key]:
+        self.ensure_fresh()
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - (self._loaded_at or 0) > 1:
+            # Ключ мог появиться после последней перечитки каталога; не чаще раза в секунду
+            self.ensure_fresh(force=True)
+            key = self._keys.get(kid)
+        return key.public if key is not None else None
+
+    def jwks(self) -> Tuple[bytes, str]:
+        if is_asymmetric(self.algorithm):
+            self.ensure_fresh()
+        return self._jwks
+
+key_ring = KeyRing(
+    settings.JWT_KEYS_DIR, settings.ALGORITHM,
+    reload_interval=settings.JWT_KEYS_RELOAD_SECONDS, activation_delay=settings.JWT_KEY_ACTIVATION_SECONDS
+)
+
+def encode(claims: dict) -> str:
+    if not is_asymmetric(settings.ALGORITHM):
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    key = key_ring.signing_key()
+    return jwt.encode(claims, key.private, algorithm=settings.ALGORITHM, headers={"kid": key.kid})
+
+def decode(token: str) -> dict:
+    if not is_asymmetric(settings.ALGORITHM):
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        # Токены, выпущенные до перехода на асимметричную подпись
+        if not settings.JWT_ACCEPT_HS256:
+            raise JWTError("Token has no kid")
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+    key = key_ring.verification_key(kid)
+    if key is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(token, key, algorithms=[settings.ALGORITHM])
+
+def generate_key(directory: Path, algorithm: str) -> Path:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    curves = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}
+    if algorithm.startswith("RS"):
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm in curves:
+        private = ec.generate_private_key(curves[algorithm]())
+    else:
+        raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{datetime.utcnow().strftime(KID_FORMAT)}.pem"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return path
+
+def prune_keys(directory: Path, max_token_lifetime: timedelta, activation_delay: timedelta):
+    # Ключ удаляется, когда подписанные им токены гарантированно истекли:
+    # его сменщик активен дольше, чем живёт самый долгий токен
+    paths = sorted(directory.glob("*.pem"), key=_created_at)
+    removed = []
+    for path, successor in zip(paths, paths[1:]):
+        if _created_at(successor) + activation_delay + max_token_lifetime < datetime.utcnow():
+            path.unlink()
+            removed.append(path)
+    return removed
+
+def rotate(force: bool = False):
+    directory = Path(settings.JWT_KEYS_DIR)
+    existing = sorted(directory.glob("*.pem"), key=_created_at) if directory.is_dir() else []
+    rotation_due = datetime.utcnow() - timedelta(days=settings.JWT_KEY_ROTATION_DAYS)
+    if existing and _created_at(existing[-1]) > rotation_due and not force:
+        print(f"Ключ {existing[-1].stem} ещё не устарел, ротация не нужна")
+    else:
+        print(f"Создан ключ {generate_key(directory, settings.ALGORITHM).stem}")
+
+    max_token_lifetime = max(
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES), timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    for path in prune_keys(directory, max_token_lifetime, timedelta(seconds=settings.JWT_KEY_ACTIVATION_SECONDS)):
+        print(f"Удалён выведенный из оборота ключ {path.stem}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Управление ключами подписи JWT")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rotate_parser = subparsers.add_parser("rotate", help="Создать новый ключ, если текущий устарел, и удалить старые")
+    rotate_parser.add_argument("--force", action="store_true", help="Создать ключ независимо от возраста текущего")
+    args = parser.parse_args()
+
+    if not is_asymmetric(settings.ALGORITHM):
+        parser.error(f"ALGORITHM={settings.ALGORITHM} не использует ключи; задайте RS256 или ES256")
+    rotate(force=args.force)
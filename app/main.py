@@ -1,11 +1,83 @@
-from fastapi import FastAPI
+import time
+
+# Засекается до остальных импортов, чтобы учесть и их время
+_import_started = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .routers import auth, users, admin, mock
+from sqlalchemy import exc
+from .audit import audit_log
+from .auth import prime_dummy_hash
+from .database import engine, SessionLocal
+from .hashing import password_hasher
+from .instrumentation import QueryStatsMiddleware, RequestMetricsMiddleware, install as install_query_stats
+from . import metrics, invalidation
+from .config import settings
+from .keys import is_asymmetric, key_ring
+from .permissions import permission_matrix
+from .roles import role_registry
+from .revocation import token_denylist
+from .routers import auth, users, admin, mock, authz
+from .token_pruner import token_pruner
+
+logger = logging.getLogger("app.startup")
+
+# Схема БД создаётся миграциями (alembic upgrade head), а не при импорте
+install_query_stats(engine)
+
+_startup = {"import": None, "total": None}
+metrics.Gauge("app_startup_seconds", "Time from importing app.main to serving requests", lambda: _startup["total"])
+
+def _warm_up():
+    # Соединения пула открываются одновременно, иначе каждое вернётся в пул и будет выдано снова
+    connections = [engine.connect() for _ in range(settings.DB_POOL_WARM)]
+    for connection in connections:
+        connection.close()
 
-Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        role_registry.load(db)
+        permission_matrix.refresh(db)
+        token_denylist.ensure_fresh(db)
+    finally:
+        db.close()
 
-app = FastAPI(title="Custom Auth System", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_started = time.perf_counter()
+    if is_asymmetric(settings.ALGORITHM):
+        # Без ключа подписи воркер не сможет выдать ни одного токена — падаем сразу
+        key_ring.signing_key()
+    prime_dummy_hash()
+    try:
+        _warm_up()
+    except exc.DBAPIError as e:
+        # Кэши заполнятся при первых запросах; недоступность БД не должна мешать старту воркера
+        logger.warning("Warm-up skipped, database unavailable: %s", e.orig)
+
+    listener = invalidation.create_listener()
+    if listener is not None:
+        listener.start()
+    audit_log.start()
+    token_pruner.start()
+
+    _startup["total"] = time.perf_counter() - _import_started
+    logger.info(
+        "Startup finished in %.1fms (import %.1fms, warm-up %.1fms)",
+        _startup["total"] * 1000, _startup["import"] * 1000, (time.perf_counter() - warm_started) * 1000,
+    )
+    yield
+    token_pruner.stop()
+    # Сначала дописываем накопленные события аудита, пока пул соединений ещё жив
+    audit_log.stop()
+    if listener is not None:
+        listener.stop()
+    password_hasher.shutdown()
+
+app = FastAPI(title="Custom Auth System", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,12 +85,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(admin.router)
 app.include_router(mock.router)
+app.include_router(authz.router)
+
+_startup["import"] = time.perf_counter() - _import_started
 
 @app.get("/")
 def read_root():
@@ -26,4 +104,16 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return metrics.render()
+
+@app.get("/.well-known/jwks.json")
+def jwks(request: Request):
+    body, etag = key_ring.jwks()
+    headers = {"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: Dict[str, "_Metric"] = {}
+
+# Значения меняются обычным += без блокировок: под GIL потеря единичного инкремента
+# при гонке допустима, а горячий путь остаётся без аллокаций и захвата lock'ов
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+        _registry[name] = self
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+    @abstractmethod
+    def snapshot(self):
+        ...
+
+    @abstractmethod
+    def render(self):
+        ...
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_string(self, values, extra=""):
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: int = 1):
+        self._default.value += amount
+
+    @property
+    def value(self):
+        return self._default.value
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self._default.value
+        return {",".join(map(str, values)): child.value for values, child in self._children.items()}
+
+    def render(self):
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{self._label_string(values)} {child.value}"
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, description, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    @staticmethod
+    def _child_snapshot(child):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(child.buckets, child.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = child.count
+        return {"count": child.count, "sum": child.sum, "buckets": buckets}
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self._child_snapshot(self._default)
+        return {",".join(map(str, values)): self._child_snapshot(child) for values, child in self._children.items()}
+
+    def render(self):
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(child.buckets, child.counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{self._label_string(values, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._label_string(values, le)} {child.count}"
+            yield f"{self.name}_sum{self._label_string(values)} {child.sum}"
+            yield f"{self.name}_count{self._label_string(values)} {child.count}"
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, read: Callable[[], object]):
+        self.read = read
+        super().__init__(name, description)
+
+    def _new_child(self):
+        return None
+
+    def snapshot(self):
+        return self.read()
+
+    def render(self):
+        value = self.read()
+        if value is not None:
+            yield f"{self.name} {value}"
+
+def snapshot():
+    return {name: metric.snapshot() for name, metric in _registry.items()}
+
+def render() -> str:
+    lines = []
+    for metric in list(_registry.values()):
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -7,25 +7,31 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True)
+    email = Column(String)
     hashed_password = Column(String)
     first_name = Column(String)
     last_name = Column(String)
     middle_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    role_id = Column(Integer, ForeignKey("roles.id"))
+    role_id = Column(Integer, ForeignKey("roles.id"), index=True)
     role = relationship("Role", back_populates="users")
 
     owned_business_elements = relationship("BusinessElement", back_populates="owner")
 
+    # Email сравнивается без учёта регистра, уникальность — тоже
+    __table_args__ = (Index("ix_users_email_lower", func.lower(email), unique=True),)
+
 class Role(Base):
     __tablename__ = "roles"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True)
     description = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     users = relationship("User", back_populates="role")
     access_rules = relationship("AccessRoleRule", back_populates="role")
@@ -38,7 +44,7 @@ class BusinessElement(Base):
     description = Column(Text, nullable=True)
 
     access_rules = relationship("AccessRoleRule", back_populates="business_element")
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
     owner = relationship("User", back_populates="owned_business_elements")
 
 class AccessRoleRule(Base):
@@ -55,6 +61,53 @@ class AccessRoleRule(Base):
     update_all_permission = Column(Boolean, default=False)
     delete_permission = Column(Boolean, default=False)
     delete_all_permission = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     role = relationship("Role", back_populates="access_rules")
-    business_element = relationship("BusinessElement", back_populates="access_rules")
\ No newline at end of file
+    business_element = relationship("BusinessElement", back_populates="access_rules")
+
+    __table_args__ = (
+        Index("uq_access_role_rules_role_element", "role_id", "business_element_id", unique=True),
+    )
+
+class Product(Base):
+    __tablename__ = "products"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+
+class Order(Base):
+    __tablename__ = "orders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String, primary_key=True)
+    family_id = Column(String, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    expires_at = Column(DateTime, index=True)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String, nullable=True)
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    action = Column(String, nullable=False, index=True)
+    actor_id = Column(Integer, index=True, nullable=True)
+    subject = Column(String, nullable=True)
+    ip = Column(String, nullable=True)
+    details = Column(Text, nullable=True)
@@ -0,0 +1,54 @@
+from typing import Callable, Optional, Type
+from fastapi import Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query as SQLQuery, Session
+from . import database
+from .config import settings
+
+DEFAULT_PAGE_SIZE = 100
+
+class PageParams:
+    def __init__(
+            self,
+            request: Request,
+            response: Response,
+            limit: Optional[int] = Query(
+                None, ge=1, le=settings.MAX_PAGE_SIZE,
+                description=f"размер страницы; без limit и after_id возвращается весь список, с after_id — {DEFAULT_PAGE_SIZE}"
+            ),
+            after_id: Optional[int] = Query(None, description="id последней записи предыдущей страницы")
+    ):
+        self.request = request
+        self.response = response
+        # Постраничный режим включается явно, чтобы старые клиенты по-прежнему получали весь список
+        self.paged = limit is not None or after_id is not None
+        self.limit = (limit or DEFAULT_PAGE_SIZE) if self.paged else None
+        self.after_id = after_id
+
+def paginate(query: SQLQuery, id_column, page: PageParams):
+    if page.after_id is not None:
+        query = query.filter(id_column > page.after_id)
+    query = query.order_by(id_column)
+    if not page.paged:
+        return query.all()
+
+    # Лишняя строка показывает, есть ли следующая страница; ссылка на неё отдаётся в заголовке Link
+    rows = query.limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_url = page.request.url.include_query_params(after_id=getattr(rows[-1], id_column.key), limit=page.limit)
+        page.response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return rows
+
+def ndjson_response(build_query: Callable[[Session], SQLQuery], schema: Type[BaseModel]):
+    # Генератор живёт дольше запроса, поэтому открывает собственную сессию
+    def generate():
+        db = database.SessionLocal()
+        try:
+            for row in build_query(db).yield_per(settings.EXPORT_BATCH_SIZE):
+                yield schema.model_validate(row).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
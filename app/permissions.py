@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from . import models, invalidation
+from .config import settings
+
+PERMISSION_BITS = {
+    "read": 1 << 0,
+    "read_all": 1 << 1,
+    "create": 1 << 2,
+    "update": 1 << 3,
+    "update_all": 1 << 4,
+    "delete": 1 << 5,
+    "delete_all": 1 << 6,
+}
+
+def rule_mask(rule) -> int:
+    mask = 0
+    for permission_type, bit in PERMISSION_BITS.items():
+        if getattr(rule, f"{permission_type}_permission", False):
+            mask |= bit
+    return mask
+
+# (role_id, element_name) -> битовая маска прав из access_role_rules
+class PermissionMatrix:
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._table: Dict[Tuple[int, str], int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl
+
+    def _reload(self, db: Session):
+        rows = db.query(models.AccessRoleRule, models.BusinessElement.name).join(
+            models.BusinessElement,
+            models.AccessRoleRule.business_element_id == models.BusinessElement.id
+        ).all()
+
+        table: Dict[Tuple[int, str], int] = {}
+        for rule, element_name in rows:
+            key = (rule.role_id, element_name)
+            table[key] = table.get(key, 0) | rule_mask(rule)
+
+        # Swap the reference in one step so readers never see a half-built table
+        self._table = table
+        self._loaded_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session):
+        if not self.is_stale():
+            return
+        with self._lock:
+            if self.is_stale():
+                self._reload(db)
+
+    def refresh(self, db: Session):
+        with self._lock:
+            self._reload(db)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def allows(self, role_id: int, element_name: str, permission_type: str) -> bool:
+        bit = PERMISSION_BITS.get(permission_type)
+        if bit is None:
+            return False
+        return bool(self._table.get((role_id, element_name), 0) & bit)
+
+    def allows_object(self, role_id: int, user_id: int, element_name: str, permission_type: str,
+                      owner_id: Optional[int] = None) -> bool:
+        # Право на конкретный объект: для чужого объекта нужно ещё и <право>_all
+        mask = self._table.get((role_id, element_name), 0)
+        bit = PERMISSION_BITS.get(permission_type)
+        if bit is None or not mask & bit:
+            return False
+        all_bit = PERMISSION_BITS.get(f"{permission_type}_all")
+        if owner_id is None or owner_id == user_id or all_bit is None:
+            return True
+        return bool(mask & all_bit)
+
+permission_matrix = PermissionMatrix(ttl=settings.PERMISSIONS_CACHE_TTL)
+
+# Матрица строится из ролей, бизнес-элементов и правил сразу, поэтому любое их изменение сбрасывает её целиком
+invalidation.subscribe("role", lambda key, version: permission_matrix.invalidate())
+invalidation.subscribe("rules", lambda key, version: permission_matrix.invalidate())
@@ -0,0 +1,176 @@
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+from typing import Dict, Optional
+from fastapi import HTTPException, status
+from .config import settings
+from . import metrics
+
+rate_limited_total = metrics.Counter(
+    "rate_limited_total", "Requests rejected by a rate limiter", ["limiter"]
+)
+
+# Скользящее окно приближается двумя соседними счётчиками фиксированных окон:
+# count = previous * (доля прошлого окна, попадающая в скользящее) + current
+def _weighted(previous: int, current: int, elapsed_fraction: float) -> float:
+    return previous * (1 - elapsed_fraction) + current
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    def hit(self, key: str, window: int) -> float:
+        ...
+
+    @abstractmethod
+    def count(self, key: str, window: int) -> float:
+        ...
+
+    @abstractmethod
+    def reset(self, key: str, window: int):
+        ...
+
+class _WindowCounter:
+    __slots__ = ("window", "bucket", "current", "previous")
+
+    def __init__(self, window: int, bucket: int):
+        self.window = window
+        self.bucket = bucket
+        self.current = 0
+        self.previous = 0
+
+    def roll(self, bucket: int):
+        if bucket == self.bucket:
+            return
+        self.previous = self.current if bucket == self.bucket + 1 else 0
+        self.current = 0
+        self.bucket = bucket
+
+class MemoryBackend(RateLimitBackend):
+    def __init__(self, sweep_every: int = 1000):
+        self._counters: Dict[str, _WindowCounter] = {}
+        self._lock = threading.Lock()
+        self._sweep_every = sweep_every
+        self._hits_since_sweep = 0
+
+    def _read(self, key: str, window: int, increment: int) -> float:
+        now = time.time()
+        bucket = int(now // window)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if not increment:
+                    return 0
+                counter = self._counters[key] = _WindowCounter(window, bucket)
+            counter.roll(bucket)
+            counter.current += increment
+            value = _weighted(counter.previous, counter.current, (now % window) / window)
+
+            if increment:
+                self._hits_since_sweep += 1
+                if self._hits_since_sweep >= self._sweep_every:
+                    self._sweep(now)
+        return value
+
+    def _sweep(self, now: float):
+        # Счётчики старше двух окон уже ни на что не влияют. У лимитеров разные окна,
+        # поэтому возраст каждого счётчика считается в его собственном окне
+        self._counters = {key: c for key, c in self._counters.items() if c.bucket >= int(now // c.window) - 1}
+        self._hits_since_sweep = 0
+
+    def hit(self, key: str, window: int) -> float:
+        return self._read(key, window, 1)
+
+    def count(self, key: str, window: int) -> float:
+        return self._read(key, window, 0)
+
+    def reset(self, key: str, window: int):
+        with self._lock:
+            self._counters.pop(key, None)
+
+class RedisBackend(RateLimitBackend):
+    def __init__(self, url: str, prefix: str = "rl:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def _keys(self, key: str, window: int, bucket: int):
+        return f"{self._prefix}{key}:{window}:{bucket}", f"{self._prefix}{key}:{window}:{bucket - 1}"
+
+    def _read(self, key: str, window: int, increment: bool) -> float:
+        now = time.time()
+        bucket = int(now // window)
+        current_key, previous_key = self._keys(key, window, bucket)
+        pipe = self._client.pipeline()
+        if increment:
+            pipe.incr(current_key)
+            pipe.expire(current_key, window * 2)
+        else:
+            pipe.get(current_key)
+        pipe.get(previous_key)
+        results = pipe.execute()
+        current = int(results[0] or 0)
+        previous = int(results[-1] or 0)
+        return _weighted(previous, current, (now % window) / window)
+
+    def hit(self, key: str, window: int) -> float:
+        return self._read(key, window, True)
+
+    def count(self, key: str, window: int) -> float:
+        return self._read(key, window, False)
+
+    def reset(self, key: str, window: int):
+        # Значение зависит только от текущего и предыдущего окна — удаляем ровно эти два ключа
+        self._client.delete(*self._keys(key, window, int(time.time() // window)))
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, name: str, limit: int, window: int):
+        self.backend = backend
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self._rejected = rate_limited_total.labels(name)
+
+    def _reject(self):
+        self._rejected.inc()
+        retry_after = max(1, math.ceil(self.window - time.time() % self.window))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def hit(self, key: str):
+        if self.limit and self.backend.hit(f"{self.name}:{key}", self.window) > self.limit:
+            self._reject()
+
+    def check(self, key: str):
+        if self.limit and self.backend.count(f"{self.name}:{key}", self.window) >= self.limit:
+            self._reject()
+
+    def record(self, key: str):
+        if self.limit:
+            self.backend.hit(f"{self.name}:{key}", self.window)
+
+    def reset(self, key: str):
+        self.backend.reset(f"{self.name}:{key}", self.window)
+
+def _create_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryBackend()
+
+backend = _create_backend()
+login_ip_limiter = RateLimiter(
+    backend, "login_ip", settings.LOGIN_RATE_LIMIT_PER_IP, settings.LOGIN_RATE_LIMIT_WINDOW
+)
+# Неудачи считаются по паре (email, IP): иначе любой мог бы заблокировать чужой аккаунт,
+# просто перебирая для него неверные пароли. Перебор одного email с разных адресов сдерживает login_ip
+login_failure_limiter = RateLimiter(
+    backend, "login_email_ip", settings.LOGIN_MAX_FAILURES, settings.LOGIN_LOCKOUT_SECONDS
+)
+
+def failure_key(email: str, ip: Optional[str]) -> str:
+    return f"{email.lower()}|{ip or 'unknown'}"
@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from . import models, invalidation
+from .config import settings
+
+# Отозванные access-токены: jti -> exp. Запись живёт ровно до истечения токена,
+# поэтому множество остаётся маленьким и проверка не требует обращения к БД
+class TokenDenylist:
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._entries: Dict[str, float] = {}
+        self._synced_at: Optional[float] = None
+        self._last_revoked_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: float):
+        self._entries[jti] = expires_at
+
+    def contains(self, jti: str) -> bool:
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, db: Session, jti: str, expires_at: float):
+        db.merge(models.RevokedToken(
+            jti=jti,
+            expires_at=datetime.utcfromtimestamp(expires_at),
+            revoked_at=datetime.utcnow()
+        ))
+        invalidation.publish(db, "token", jti, expires_at)
+
+    def is_stale(self) -> bool:
+        synced_at = self._synced_at
+        return synced_at is None or time.monotonic() - synced_at > self.sync_interval
+
+    def invalidate(self):
+        self._synced_at = None
+
+    def ensure_fresh(self, db: Session):
+        if not self.is_stale():
+            return
+        with self._lock:
+            if self.is_stale():
+                self._sync(db)
+
+    def _sync(self, db: Session):
+        now = datetime.utcnow()
+        query = db.query(
+            models.RevokedToken.jti, models.RevokedToken.expires_at, models.RevokedToken.revoked_at
+        ).filter(models.RevokedToken.expires_at > now)
+        if self._last_revoked_at is not None:
+            # Небольшое перекрытие на случай расхождения часов между хостами
+            query = query.filter(models.RevokedToken.revoked_at >= self._last_revoked_at - timedelta(seconds=60))
+
+        for jti, expires_at, revoked_at in query.all():
+            self._entries[jti] = (expires_at - datetime(1970, 1, 1)).total_seconds()
+            if self._last_revoked_at is None or revoked_at > self._last_revoked_at:
+                self._last_revoked_at = revoked_at
+        if self._last_revoked_at is None:
+            self._last_revoked_at = now
+
+        current = time.time()
+        self._entries = {jti: exp for jti, exp in self._entries.items() if exp > current}
+        self._synced_at = time.monotonic()
+
+token_denylist = TokenDenylist(sync_interval=settings.DENYLIST_SYNC_SECONDS)
+
+def _on_token_revoked(jti, expires_at):
+    if jti is None:
+        token_denylist.invalidate()
+    else:
+        token_denylist.add(jti, expires_at)
+
+invalidation.subscribe("token", _on_token_revoked)
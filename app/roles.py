@@ -0,0 +1,37 @@
+import threading
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from . import models, invalidation
+
+class RoleRegistry:
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        self._ids = {name: role_id for name, role_id in db.query(models.Role.name, models.Role.id).all()}
+
+    def set(self, name: str, role_id: int):
+        with self._lock:
+            ids = dict(self._ids)
+            ids[name] = role_id
+            self._ids = ids
+
+    def get_id(self, db: Session, name: str) -> Optional[int]:
+        role_id = self._ids.get(name)
+        if role_id is not None:
+            return role_id
+
+        # Роль могла появиться в другом воркере — проверяем БД и запоминаем
+        row = db.query(models.Role.id).filter(models.Role.name == name).first()
+        if row is None:
+            return None
+        self.set(name, row.id)
+        return row.id
+
+    def invalidate(self):
+        self._ids = {}
+
+role_registry = RoleRegistry()
+
+invalidation.subscribe("role", lambda role_id, version: role_registry.invalidate())
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
-from .. import schemas, models, database
+from .. import schemas, models, database, etags, metrics, bulk, instrumentation, invalidation, user_transfer
+from ..audit import audit_log, client_ip
 from ..dependencies import require_admin
+from ..pagination import PageParams, paginate, ndjson_response
+from ..permissions import permission_matrix
+from ..roles import role_registry
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.post("/roles", response_model=schemas.RoleResponse, status_code=status.HTTP_201_CREATED)
 def create_role(
+        request: Request,
         role: schemas.RoleCreate,
         db: Session = Depends(database.get_db),
         current_user: models.User = Depends(require_admin)
@@ -18,20 +27,67 @@ def create_role(
 
     db_role = models.Role(**role.dict())
     db.add(db_role)
+    db.flush()
+    invalidation.publish(db, "role", db_role.id)
     db.commit()
     db.refresh(db_role)
+    role_registry.set(db_role.name, db_role.id)
+    audit_log.record("role.create", actor_id=current_user.id, subject=db_role.name, ip=client_ip(request))
     return db_role
 
+@router.post("/roles/bulk", response_model=schemas.BulkResponse)
+def bulk_upsert_roles(
+        request: Request,
+        batch: schemas.RoleBulkRequest,
+        db: Session = Depends(database.get_db),
+        current_user: models.User = Depends(require_admin)
+):
+    results = bulk.upsert_roles(db, batch.items)
+    invalidation.publish(db, "role")
+    db.commit()
+    for item, result in zip(batch.items, results):
+        role_registry.set(item.name, result.id)
+    audit_log.record("role.bulk_upsert", actor_id=current_user.id, ip=client_ip(request),
+                     names=[item.name for item in batch.items])
+    return {"results": results}
+
+@router.post("/roles/bulk-delete", response_model=schemas.BulkResponse)
+def bulk_delete_roles(
+        request: Request,
+        batch: schemas.BulkDeleteRequest,
+        db: Session = Depends(database.get_db),
+        current_user: models.User = Depends(require_admin)
+):
+    results = bulk.delete_roles(db, batch.ids)
+    invalidation.publish(db, "role")
+    db.commit()
+    audit_log.record("role.bulk_delete", actor_id=current_user.id, ip=client_ip(request), ids=batch.ids)
+    return {"results": results}
+
 @router.get("/roles", response_model=List[schemas.RoleResponse])
 def get_roles(
+        request: Request,
+        response: Response,
+        page: PageParams = Depends(),
         db: Session = Depends(database.get_db),
         current_user: models.User = Depends(require_admin)
 ):
-    roles = db.query(models.Role).all()
-    return roles
+    etag = etags.weak_etag("roles", etags.role_versions.get(db), page.limit, page.after_id)
+    if etags.matches(request, etag):
+        return etags.not_modified("roles", etag)
+    etags.set_etag(response, etag)
+    return paginate(db.query(models.Role), models.Role.id, page)
+
+@router.get("/roles/export")
+def export_roles(current_user: models.User = Depends(require_admin)):
+    return ndjson_response(
+        lambda db: db.query(models.Role).order_by(models.Role.id),
+        schemas.RoleResponse
+    )
 
 @router.post("/business-elements", response_model=schemas.BusinessElementResponse, status_code=status.HTTP_201_CREATED)
 def create_business_element(
+        request: Request,
         element: schemas.BusinessElementCreate,
         db: Session = Depends(database.get_db),
         current_user: models.User = Depends(require_admin)
@@ -44,26 +100,168 @@ def create_business_element(
 
     db_element = models.BusinessElement(**element.dict())
     db.add(db_element)
+    invalidation.publish(db, "rules")
     db.commit()
     db.refresh(db_element)
+    permission_matrix.refresh(db)
+    audit_log.record("business_element.create", actor_id=current_user.id, subject=db_element.name,
+                     ip=client_ip(request))
     return db_element
 
+@router.post("/business-elements/bulk", response_model=schemas.BulkResponse)
+def bulk_upsert_business_elements(
+        request: Request,
+        batch: schemas.BusinessElementBulkRequest,
+        db: Session = Depends(database.get_db),
+        current_user: models.User = Depends(require_admin)
+):
+    results = bulk.upsert_business_elements(db, batch.items)
+    invalidation.publish(db, "rules")
+    db.commit()
+    permission_matrix.refresh(db)
+    audit_log.record("business_element.bulk_upsert", actor_id=current_user.id, ip=client_ip(request),
+                     names=[item.name for item in batch.items])
+    return {"results": results}
+
+@router.post("/business-elements/bulk-delete", response_model=schemas.BulkResponse)
+def bulk_delete_business_elements(
+        request: Request,
+        batch: schemas.BulkDeleteRequest,
+        db: Session = Depends(database.get_db),
+        current_user: models.User = Depends(require_admin)
+):
+    results = bulk.delete_business_elements(db, batch.ids)
+    invalidation.publish(db, "rules")
+    db.commit()
+    permission_matrix.refresh(db)
+    audit_log.record("business_element.bulk_delete", actor_id=current_user.id, ip=client_ip(request), ids=batch.ids)
+    return {"results": results}
+
 @router.post("/access-rules", response_model=schemas.AccessRuleResponse, status_code=status.HTTP_201_CREATED)
 def create_access_rule(
+        request: Request,
         rule: schemas.AccessRuleCreate,
         db: Session = Depends(database.get_db),
         current_user: models.User = Depends(require_admin)
 ):
+    existing_rule = db.query(models.AccessRoleRule.id).filter(
+        models.AccessRoleRule.role_id == rule.role_id,
+        models.AccessRoleRule.business_element_id == rule.business_element_id
+    ).first()
+    if existing_rule:
+        raise HTTPException(status_code=400, detail="Access rule already exists")
+
     db_rule = models.AccessRoleRule(**rule.dict())
     db.add(db_rule)
-    db.commit()
+    invalidation.publish(db, "rules")
+    try:
+        db.commit()
+    except IntegrityError:
+        # Одновременный запрос успел создать то же правило — его ловит уникальный индекс
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Access rule already exists")
     db.refresh(db_rule)
+    permission_matrix.refresh(db)
+    audit_log.record("access_rule.create", actor_id=current_user.id, subject=str(db_rule.id), ip=client_ip(request),
+                     **rule.dict())
     return db_rule
 
+@router.post("/access-rules/bulk", response_model=schemas.BulkResponse)
+def bulk_upsert_access_rules(
+        request: Request,
+        batch: schemas.AccessRuleBulkRequest,
+        db: Session = Depends(database.get_db),
+        current_user: models.User = Depends(require_admin)
+):
+    results = bulk.upsert_access_rules(db, batch.items)
+    invalidation.publish(db, "rules")
+    db.commit()
+    permission_matrix.refresh(db)
+    audit_log.record("access_rule.bulk_upsert", actor_id=current_user.id, ip=client_ip(request),
+                     ids=[result.id for result in results])
+    return {"results": results}
+
+@router.post("/access-rules/bulk-delete", response_model=schemas.BulkResponse)
+def bulk_delete_access_rules(
+        request: Request,
+        batch: schemas.BulkDeleteRequest,
+        db: Session = Depends(database.get_db),
+        current_user: models.User = Depends(require_admin)
+):
+    results = bulk.delete_access_rules(db, batch.ids)
+    invalidation.publish(db, "rules")
+    db.commit()
+    permission_matrix.refresh(db)
+    audit_log.record("access_rule.bulk_delete", actor_id=current_user.id, ip=client_ip(request), ids=batch.ids)
+    return {"results": results}
+
 @router.get("/access-rules", response_model=List[schemas.AccessRuleResponse])
 def get_access_rules(
+        request: Request,
+        response: Response,
+        page: PageParams = Depends(),
         db: Session = Depends(database.get_db),
         current_user: models.User = Depends(require_admin)
 ):
-    rules = db.query(models.AccessRoleRule).all()
-    return rules
\ No newline at end of file
+    etag = etags.weak_etag("access_rules", etags.rule_versions.get(db), page.limit, page.after_id)
+    if etags.matches(request, etag):
+        return etags.not_modified("access_rules", etag)
+    etags.set_etag(response, etag)
+    return paginate(db.query(models.AccessRoleRule), models.AccessRoleRule.id, page)
+
+@router.get("/access-rules/export")
+def export_access_rules(current_user: models.User = Depends(require_admin)):
+    return ndjson_response(
+        lambda db: db.query(models.AccessRoleRule).order_by(models.AccessRoleRule.id),
+        schemas.AccessRuleResponse
+    )
+
+@router.post("/users/import")
+def import_users(
+        request: Request,
+        file: UploadFile = File(...),
+        format: str = Query(None, pattern="^(csv|ndjson)$"),
+        batch_size: int = Query(None, ge=1, le=100000),
+        current_user: models.User = Depends(require_admin)
+):
+    fmt = format or user_transfer.detect_format(file.filename or "")
+    ip = client_ip(request)
+
+    # Ход импорта и отклонённые строки отдаются потоком NDJSON по мере обработки пачек
+    def generate():
+        db = database.SessionLocal()
+        try:
+            stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+            for event in user_transfer.iter_import(db, stream, fmt, batch_size):
+                if event["type"] == "summary":
+                    audit_log.record("users.import", actor_id=current_user.id, subject=file.filename, ip=ip,
+                                     processed=event["processed"], imported=event["imported"],
+                                     rejected=event["rejected"])
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/users/export")
+def export_users(
+        format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+        current_user: models.User = Depends(require_admin)
+):
+    def generate():
+        db = database.SessionLocal()
+        try:
+            yield from user_transfer.iter_export(db, format)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type)
+
+@router.get("/stats")
+def get_stats(current_user: models.User = Depends(require_admin)):
+    return metrics.snapshot()
+
+@router.get("/stats/queries")
+def get_query_stats(current_user: models.User = Depends(require_admin)):
+    return instrumentation.route_stats()
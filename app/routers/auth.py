@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from datetime import timedelta
 from .. import schemas, models, auth, database
-from ..config import settings
+from ..audit import audit_log, client_ip
+from ..roles import role_registry
+from ..rate_limit import login_ip_limiter, login_failure_limiter, failure_key
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -11,12 +14,12 @@ def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
     if user.password != user.password_confirm:
         raise HTTPException(status_code=400, detail="Passwords do not match")
 
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = db.query(models.User.id).filter(func.lower(models.User.email) == user.email.lower()).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    default_role = db.query(models.Role).filter(models.Role.name == "user").first()
-    if not default_role:
+    default_role_id = role_registry.get_id(db, "user")
+    if default_role_id is None:
         raise HTTPException(status_code=500, detail="Default role not configured")
 
     db_user = models.User(
@@ -25,7 +28,7 @@ def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
         first_name=user.first_name,
         last_name=user.last_name,
         middle_name=user.middle_name,
-        role_id=default_role.id
+        role_id=default_role_id
     )
     db.add(db_user)
     db.commit()
@@ -33,21 +36,47 @@ def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
     return db_user
 
 @router.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(database.get_db)):
+def login(request: Request, user_credentials: schemas.UserLogin, db: Session = Depends(database.get_db)):
+    # Лимиты проверяются до обращения к БД и bcrypt
+    email_key = user_credentials.email.lower()
+    ip = client_ip(request)
+    lockout_key = failure_key(email_key, ip)
+    login_ip_limiter.hit(ip or "unknown")
+    login_failure_limiter.check(lockout_key)
+
     user = auth.authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
+        auth.login_total.labels("failure").inc()
+        login_failure_limiter.record(lockout_key)
+        audit_log.record("login.failure", subject=email_key, ip=ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    auth.login_total.labels("success").inc()
+    login_failure_limiter.reset(lockout_key)
+    tokens, _ = auth.issue_tokens(db, auth.token_claims(user), user.id)
+    db.commit()
+    audit_log.record("login.success", actor_id=user.id, subject=email_key, ip=ip)
+    return tokens
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh(request: schemas.RefreshRequest, db: Session = Depends(database.get_db)):
+    tokens = auth.rotate_refresh_token(db, request.refresh_token)
+    db.commit()
+    return tokens
 
 @router.post("/logout")
-def logout(current_user: models.User = Depends(auth.get_current_user)):
+def logout(
+        credentials: HTTPAuthorizationCredentials = Depends(auth.oauth2_scheme),
+        current_user: models.User = Depends(auth.get_current_user),
+        db: Session = Depends(database.get_db)
+):
+    payload = auth.decode_token(credentials.credentials)
+    auth.revoke_access_token(db, payload)
+    if payload.get("sid"):
+        auth.revoke_refresh_tokens(db, family_id=payload["sid"])
+    db.commit()
     return {"message": "Successfully logged out"}
\ No newline at end of file
@@ -0,0 +1,39 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from .. import schemas, auth, database
+from ..permissions import permission_matrix
+
+router = APIRouter(prefix="/authz", tags=["authz"])
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+# Токен проверяемого пользователя берётся из тела запроса (шлюз) или из заголовка Authorization (UI)
+@router.post("/check", response_model=schemas.AuthzCheckResponse)
+def check_permissions(
+        request: schemas.AuthzCheckRequest,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+        db: Session = Depends(database.get_db)
+):
+    if request.token:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=request.token)
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    principal = auth.get_current_principal(credentials, db)
+    permission_matrix.ensure_fresh(db)
+    return schemas.AuthzCheckResponse(
+        user_id=principal.id,
+        role_id=principal.role_id,
+        results=[
+            permission_matrix.allows_object(
+                principal.role_id, principal.id, check.element, check.permission, check.owner_id
+            )
+            for check in request.checks
+        ]
+    )
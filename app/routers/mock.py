@@ -1,21 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
 from .. import schemas, models, database
 from ..dependencies import require_permission, get_current_active_user, check_permission
+from ..pagination import PageParams, paginate, ndjson_response
 
 router = APIRouter(prefix="/mock", tags=["mock-business"])
 
-# Mock data storage
-mock_products = []
-mock_orders = []
+def _visible_products(db: Session, current_user: models.User):
+    query = db.query(models.Product)
+    if not check_permission(db, current_user, "products", "read_all"):
+        query = query.filter(models.Product.owner_id == current_user.id)
+    return query
+
+def _visible_orders(db: Session, current_user: models.User):
+    query = db.query(models.Order)
+    if not check_permission(db, current_user, "orders", "read_all"):
+        query = query.filter(models.Order.user_id == current_user.id)
+    return query
 
 @router.get("/products", response_model=List[schemas.MockProduct])
 def get_products(
+        page: PageParams = Depends(),
         current_user: models.User = Depends(require_permission("products", "read")),
         db: Session = Depends(database.get_db)
 ):
-    return mock_products
+    return paginate(_visible_products(db, current_user), models.Product.id, page)
+
+@router.get("/products/export")
+def export_products(current_user: models.User = Depends(require_permission("products", "read"))):
+    return ndjson_response(
+        lambda db: _visible_products(db, current_user).order_by(models.Product.id),
+        schemas.MockProduct
+    )
 
 @router.post("/products", response_model=schemas.MockProduct, status_code=status.HTTP_201_CREATED)
 def create_product(
@@ -23,9 +41,19 @@ def create_product(
         current_user: models.User = Depends(require_permission("products", "create")),
         db: Session = Depends(database.get_db)
 ):
-    product.owner_id = current_user.id
-    mock_products.append(product)
-    return product
+    if db.get(models.Product, product.id):
+        raise HTTPException(status_code=400, detail="Product already exists")
+
+    db_product = models.Product(id=product.id, name=product.name, owner_id=current_user.id)
+    db.add(db_product)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Проверка выше не защищает от одновременного создания с тем же id
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Product already exists")
+    db.refresh(db_product)
+    return db_product
 
 @router.put("/products/{product_id}", response_model=schemas.MockProduct)
 def update_product(
@@ -34,13 +62,16 @@ def update_product(
         current_user: models.User = Depends(require_permission("products", "update")),
         db: Session = Depends(database.get_db)
 ):
-    for i, product in enumerate(mock_products):
-        if product.id == product_id:
-            if product.owner_id == current_user.id or check_permission(db, current_user, "products", "update_all"):
-                mock_products[i] = product_update
-                return product_update
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-    raise HTTPException(status_code=404, detail="Product not found")
+    product = db.get(models.Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.owner_id != current_user.id and not check_permission(db, current_user, "products", "update_all"):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    product.name = product_update.name
+    db.commit()
+    db.refresh(product)
+    return product
 
 @router.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_product(
@@ -48,20 +79,30 @@ def delete_product(
         current_user: models.User = Depends(require_permission("products", "delete")),
         db: Session = Depends(database.get_db)
 ):
-    for i, product in enumerate(mock_products):
-        if product.id == product_id:
-            if product.owner_id == current_user.id or check_permission(db, current_user, "products", "delete_all"):
-                mock_products.pop(i)
-                return None
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-    raise HTTPException(status_code=404, detail="Product not found")
+    product = db.get(models.Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.owner_id != current_user.id and not check_permission(db, current_user, "products", "delete_all"):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    db.delete(product)
+    db.commit()
+    return None
 
 @router.get("/orders", response_model=List[schemas.MockOrder])
 def get_orders(
+        page: PageParams = Depends(),
         current_user: models.User = Depends(require_permission("orders", "read")),
         db: Session = Depends(database.get_db)
 ):
-    return mock_orders
+    return paginate(_visible_orders(db, current_user), models.Order.id, page)
+
+@router.get("/orders/export")
+def export_orders(current_user: models.User = Depends(require_permission("orders", "read"))):
+    return ndjson_response(
+        lambda db: _visible_orders(db, current_user).order_by(models.Order.id),
+        schemas.MockOrder
+    )
 
 @router.post("/orders", response_model=schemas.MockOrder, status_code=status.HTTP_201_CREATED)
 def create_order(
@@ -69,6 +110,16 @@ def create_order(
         current_user: models.User = Depends(require_permission("orders", "create")),
         db: Session = Depends(database.get_db)
 ):
-    order.user_id = current_user.id
-    mock_orders.append(order)
-    return order
\ No newline at end of file
+    if db.get(models.Order, order.id):
+        raise HTTPException(status_code=400, detail="Order already exists")
+
+    db_order = models.Order(id=order.id, product_id=order.product_id, user_id=current_user.id)
+    db.add(db_order)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Проверка выше не защищает от одновременного создания с тем же id
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Order already exists")
+    db.refresh(db_order)
+    return db_order
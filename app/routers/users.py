@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from .. import schemas, models, auth, database
+from .. import schemas, models, auth, database, etags, invalidation
+from ..audit import audit_log, client_ip
 from ..dependencies import get_current_active_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me", response_model=schemas.UserResponse)
-def get_current_user_info(current_user: models.User = Depends(get_current_active_user)):
+def get_current_user_info(
+        request: Request,
+        response: Response,
+        principal=Depends(auth.get_current_principal),
+        db: Session = Depends(database.get_db)
+):
+    # При TOKEN_FAST_PATH principal — снимок из кэша, и неизменившийся профиль отдаётся как 304 без БД
+    etag = etags.user_etag(principal.id, principal.updated_at)
+    if etags.matches(request, etag):
+        return etags.not_modified("users_me", etag)
+
+    current_user = principal if isinstance(principal, models.User) else db.get(models.User, principal.id)
+    if current_user is None or not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    etags.set_etag(response, etags.user_etag(current_user.id, current_user.updated_at))
     return current_user
 
 @router.put("/me", response_model=schemas.UserResponse)
@@ -16,7 +33,9 @@ def update_current_user(
         db: Session = Depends(database.get_db)
 ):
     if user_update.email and user_update.email != current_user.email:
-        existing_user = db.query(models.User).filter(models.User.email == user_update.email).first()
+        existing_user = db.query(models.User.id).filter(
+            func.lower(models.User.email) == user_update.email.lower(), models.User.id != current_user.id
+        ).first()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         current_user.email = user_update.email
@@ -28,15 +47,23 @@ def update_current_user(
     if user_update.middle_name is not None:
         current_user.middle_name = user_update.middle_name
 
+    invalidation.publish(db, "user", current_user.id, current_user.token_version)
     db.commit()
     db.refresh(current_user)
     return current_user
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_current_user(
+        request: Request,
+        credentials: HTTPAuthorizationCredentials = Depends(auth.oauth2_scheme),
         current_user: models.User = Depends(get_current_active_user),
         db: Session = Depends(database.get_db)
 ):
     current_user.is_active = False
+    auth.bump_token_version(current_user)
+    auth.revoke_access_token(db, auth.decode_token(credentials.credentials))
+    auth.revoke_refresh_tokens(db, user_id=current_user.id)
+    invalidation.publish(db, "user", current_user.id, current_user.token_version)
     db.commit()
+    audit_log.record("user.delete", actor_id=current_user.id, subject=current_user.email, ip=client_ip(request))
     return None
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
 
 # User
@@ -34,8 +34,12 @@ class UserLogin(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 # Role
 class RoleBase(BaseModel):
     name: str
@@ -89,13 +93,84 @@ class AccessRuleResponse(AccessRuleBase):
     class Config:
         from_attributes = True
 
+# Bulk
+MAX_BULK_ITEMS = 10000
+
+class RoleBulkRequest(BaseModel):
+    items: List[RoleCreate] = Field(max_length=MAX_BULK_ITEMS)
+
+class BusinessElementBulkRequest(BaseModel):
+    items: List[BusinessElementCreate] = Field(max_length=MAX_BULK_ITEMS)
+
+class AccessRuleBulkRequest(BaseModel):
+    items: List[AccessRuleCreate] = Field(max_length=MAX_BULK_ITEMS)
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[int] = Field(max_length=MAX_BULK_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+
+# Import / export
+class UserImportRow(BaseModel):
+    email: EmailStr
+    hashed_password: str
+    first_name: str = ""
+    last_name: str = ""
+    middle_name: Optional[str] = None
+    role: Optional[str] = None
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+
+class UserExportRow(BaseModel):
+    email: str
+    hashed_password: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    middle_name: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Authz
+MAX_AUTHZ_CHECKS = 500
+
+class AuthzCheckItem(BaseModel):
+    element: str
+    permission: str
+    owner_id: Optional[int] = None
+
+class AuthzCheckRequest(BaseModel):
+    token: Optional[str] = None
+    checks: List[AuthzCheckItem] = Field(max_length=MAX_AUTHZ_CHECKS)
+
+class AuthzCheckResponse(BaseModel):
+    user_id: int
+    role_id: int
+    results: List[bool]
+
 # Mocks
 class MockProduct(BaseModel):
     id: int
     name: str
     owner_id: int
 
+    class Config:
+        from_attributes = True
+
 class MockOrder(BaseModel):
     id: int
     product_id: int
-    user_id: int
\ No newline at end of file
+    user_id: int
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
@@ -0,0 +1,69 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, select
+from .config import settings
+from .database import SessionLocal
+from . import metrics, models
+
+logger = logging.getLogger("app.token_pruner")
+
+pruned_total = metrics.Counter("token_rows_pruned_total", "Expired token rows deleted", ["table"])
+prune_failures_total = metrics.Counter("token_prune_failures_total", "Token prune runs that failed")
+
+# Истёкшие токены не пройдут проверку exp, поэтому их строки больше не нужны ни для отзыва,
+# ни для обнаружения повторного использования. Удаляются фоновым потоком раз в interval секунд,
+# пачками по batch_size строк, каждая в своей короткой транзакции — запросы входа и обмена токенов
+# этого не ждут, а блокировки держатся недолго при любом размере таблиц
+class TokenPruner:
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _prune_table(self, model, expired_before: datetime) -> int:
+        expired = select(model.jti).where(model.expires_at < expired_before).limit(self.batch_size)
+        total = 0
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                deleted = db.execute(delete(model).where(model.jti.in_(expired))).rowcount
+                db.commit()
+            finally:
+                db.close()
+            total += deleted
+            pruned_total.labels(model.__tablename__).inc(deleted)
+            if deleted < self.batch_size:
+                break
+        return total
+
+    def prune(self) -> int:
+        expired_before = datetime.utcnow()
+        return sum(self._prune_table(model, expired_before) for model in (models.RefreshToken, models.RevokedToken))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.prune()
+            except Exception:
+                prune_failures_total.inc()
+                logger.exception("Failed to prune expired tokens")
+
+    def start(self):
+        if not self.interval or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-pruner", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        # Текущая пачка дописывается, следующая уже не начинается
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+token_pruner = TokenPruner(settings.TOKEN_PRUNE_SECONDS, settings.TOKEN_PRUNE_BATCH_SIZE)
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+from .config import settings
+from . import invalidation
+
+class UserSnapshot(NamedTuple):
+    id: int
+    role_id: int
+    is_active: bool
+    version: int
+    updated_at: Optional[datetime] = None
+
+class UserSnapshotCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[UserSnapshot]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            snapshot, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return snapshot
+
+    def put(self, snapshot: UserSnapshot):
+        with self._lock:
+            self._entries[snapshot.id] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserSnapshotCache(max_size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+def _on_user_changed(user_id, version):
+    if user_id is None:
+        user_cache.clear()
+    else:
+        user_cache.invalidate(user_id)
+
+invalidation.subscribe("user", _on_user_changed)
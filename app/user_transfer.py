@@ -0,0 +1,190 @@
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Iterator, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from . import bulk, models, schemas
+from .config import settings
+from .database import SessionLocal
+from .hashing import pwd_context
+
+EXPORT_COLUMNS = list(schemas.UserExportRow.model_fields)
+
+def detect_format(path: str, default: str = "csv") -> str:
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if path.endswith(".csv"):
+        return "csv"
+    return default
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    # (номер строки файла, запись); None — строку не удалось разобрать
+    if fmt == "csv":
+        for line, row in enumerate(csv.DictReader(stream), start=2):
+            yield line, {key: value for key, value in row.items() if key and value != ""}
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+def _validation_reason(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+# Поток событий импорта: reject на каждую отклонённую строку, progress после каждой пачки, summary в конце.
+# В памяти держится только текущая пачка
+def iter_import(db: Session, stream: TextIO, fmt: str, batch_size: Optional[int] = None) -> Iterator[dict]:
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    role_ids = {name: role_id for name, role_id in db.query(models.Role.name, models.Role.id).all()}
+    default_role_id = role_ids.get("user")
+    counts = {"processed": 0, "imported": 0, "rejected": 0}
+    started = time.monotonic()
+    batch, lines = [], {}
+
+    def reject(line, email, reason):
+        counts["rejected"] += 1
+        return {"type": "reject", "line": line, "email": email, "reason": reason}
+
+    def flush():
+        inserted = bulk.insert_users(db, batch)
+        db.commit()
+        counts["imported"] += len(inserted)
+        for email_key, (line, email) in lines.items():
+            if email_key not in inserted:
+                yield reject(line, email, "Email already registered")
+        batch.clear()
+        lines.clear()
+        elapsed = time.monotonic() - started
+        yield {"type": "progress", **counts, "rows_per_second": round(counts["processed"] / elapsed if elapsed else 0)}
+
+    for line, raw in read_rows(stream, fmt):
+        counts["processed"] += 1
+        if raw is None:
+            yield reject(line, None, "Malformed row")
+            continue
+        try:
+            item = schemas.UserImportRow.model_validate(raw)
+        except ValidationError as e:
+            yield reject(line, raw.get("email"), _validation_reason(e))
+            continue
+
+        # Хэши переносятся как есть; схема должна быть в PASSWORD_SCHEMES, иначе вход будет невозможен
+        if pwd_context.identify(item.hashed_password) is None:
+            yield reject(line, item.email, "Unsupported password hash")
+            continue
+        role_id = role_ids.get(item.role) if item.role else default_role_id
+        if role_id is None:
+            yield reject(line, item.email, f"Unknown role {item.role!r}")
+            continue
+        email_key = item.email.lower()
+        if email_key in lines:
+            yield reject(line, item.email, "Duplicate email in batch")
+            continue
+
+        lines[email_key] = (line, item.email)
+        batch.append({
+            "email": item.email, "hashed_password": item.hashed_password,
+            "first_name": item.first_name, "last_name": item.last_name, "middle_name": item.middle_name,
+            "role_id": role_id, "is_active": item.is_active, "created_at": item.created_at or datetime.utcnow(),
+        })
+        if len(batch) >= batch_size:
+            yield from flush()
+
+    if batch:
+        yield from flush()
+    yield {"type": "summary", **counts, "seconds": round(time.monotonic() - started, 3)}
+
+def export_query(db: Session):
+    return db.query(
+        models.User.email, models.User.hashed_password, models.User.first_name, models.User.last_name,
+        models.User.middle_name, models.Role.name.label("role"), models.User.is_active, models.User.created_at,
+    ).outerjoin(models.Role, models.User.role_id == models.Role.id).order_by(models.User.id)
+
+def iter_export(db: Session, fmt: str) -> Iterator[str]:
+    rows = export_query(db).yield_per(settings.EXPORT_BATCH_SIZE)
+    if fmt == "ndjson":
+        for row in rows:
+            yield schemas.UserExportRow.model_validate(row).model_dump_json() + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        # Сбрасываем буфер пачками, а не построчно
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export_users(db: Session, out: TextIO, fmt: str):
+    if fmt == "csv" and db.get_bind().dialect.name == "postgresql":
+        # COPY TO STDOUT отдаёт строки потоком прямо из сервера
+        sql = export_query(db).statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        db.connection().connection.cursor().copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+        return
+    for chunk in iter_export(db, fmt):
+        out.write(chunk)
+
+def _open(path: str, mode: str) -> TextIO:
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer if "r" in mode else sys.stdout.buffer, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8-sig" if "r" in mode else "utf-8", newline="")
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт и экспорт пользователей с сохранением хэшей паролей")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Загрузить пользователей из CSV или NDJSON")
+    import_parser.add_argument("path", help="файл или - для stdin")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"])
+    import_parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    import_parser.add_argument("--rejects", help="куда записать отклонённые строки (NDJSON)")
+    export_parser = subparsers.add_parser("export", help="Выгрузить пользователей в CSV или NDJSON")
+    export_parser.add_argument("path", help="файл или - для stdout")
+    export_parser.add_argument("--format", choices=["csv", "ndjson"])
+    args = parser.parse_args()
+    fmt = args.format or detect_format(args.path)
+
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            with _open(args.path, "w") as out:
+                export_users(db, out, fmt)
+            return
+
+        rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+        try:
+            with _open(args.path, "r") as stream:
+                for event in iter_import(db, stream, fmt, args.batch_size):
+                    if event["type"] == "reject":
+                        if rejects:
+                            rejects.write(json.dumps(event, ensure_ascii=False) + "\n")
+                    elif event["type"] == "progress":
+                        print(
+                            f"Обработано {event['processed']}, загружено {event['imported']}, "
+                            f"отклонено {event['rejected']} ({event['rows_per_second']} строк/с)",
+                            file=sys.stderr
+                        )
+                    else:
+                        print(json.dumps(event, ensure_ascii=False))
+        finally:
+            if rejects:
+                rejects.close()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import json
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def change(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    print(f"{(before.get('commit') or '?')[:10]} -> {(after.get('commit') or '?')[:10]}")
+    print(f"{'scenario':<22}{'rps':>25}{'p99 ms':>27}{'queries/req':>20}")
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if not old or "latency_ms" not in old or "latency_ms" not in new:
+            print(f"{name:<22}{'(no baseline)':>22}")
+            continue
+        print(
+            f"{name:<22}"
+            f"{old['throughput_rps']:>8} -> {new['throughput_rps']:<6}{change(old['throughput_rps'], new['throughput_rps']):>7}"
+            f"{old['latency_ms']['p99']:>9} -> {new['latency_ms']['p99']:<7}{change(old['latency_ms']['p99'], new['latency_ms']['p99']):>7}"
+            f"{old['queries_per_request']:>8} -> {new['queries_per_request']}"
+        )
+
+if __name__ == "__main__":
+    main()
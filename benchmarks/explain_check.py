@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Проверяет по EXPLAIN, что горячие запросы идут по индексам. Код выхода 1, если хотя бы один — нет
+def checks():
+    from sqlalchemy import func
+    from app import models
+
+    return [
+        (
+            "login by email", "ix_users_email_lower",
+            lambda db: db.query(models.User.id, models.User.hashed_password).filter(
+                func.lower(models.User.email) == "admin@example.com"
+            ),
+        ),
+        (
+            "rule by role and element", "uq_access_role_rules_role_element",
+            lambda db: db.query(models.AccessRoleRule.id).filter(
+                models.AccessRoleRule.role_id == 1, models.AccessRoleRule.business_element_id == 1
+            ),
+        ),
+        (
+            "users by role", "ix_users_role_id",
+            lambda db: db.query(models.User.id).filter(models.User.role_id == 1),
+        ),
+        (
+            "elements by owner", "ix_business_elements_owner_id",
+            lambda db: db.query(models.BusinessElement.id).filter(models.BusinessElement.owner_id == 1),
+        ),
+    ]
+
+def explain(db, query) -> str:
+    from sqlalchemy import text
+
+    bind = db.get_bind()
+    sql = str(query.statement.compile(bind, compile_kwargs={"literal_binds": True}))
+    if bind.dialect.name == "postgresql":
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return json.dumps(plan)
+    return "\n".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all())
+
+def main():
+    parser = argparse.ArgumentParser(description="Assert that hot lookups use their indexes")
+    parser.add_argument("--database", help="database URL (default: temporary SQLite with migrations applied)")
+    parser.add_argument("--verbose", action="store_true", help="print full plans")
+    args = parser.parse_args()
+
+    os.environ["DATABASE"] = args.database or f"sqlite:///{Path(tempfile.mkdtemp()) / 'explain.sqlite'}"
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app.init_db import run_migrations
+
+    if not args.database:
+        run_migrations()
+
+    db = SessionLocal()
+    failed = 0
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            # На маленьких таблицах планировщик честно выбирает seq scan; проверяем, что индекс применим
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, index, build in checks():
+            plan = explain(db, build(db))
+            ok = index in plan
+            failed += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<28} {index}")
+            if args.verbose or not ok:
+                print(f"     {plan}")
+    finally:
+        db.rollback()
+        db.close()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
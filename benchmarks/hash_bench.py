@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.hashing import build_context
+
+DEFAULT_CANDIDATES = "bcrypt:10,bcrypt:11,bcrypt:12,bcrypt:13,argon2:2:19456:1,argon2:3:65536:4"
+
+def parse_candidate(spec: str) -> dict:
+    parts = spec.split(":")
+    if parts[0] == "bcrypt":
+        return {"schemes": ["bcrypt"], "bcrypt_rounds": int(parts[1])}
+    if parts[0] == "argon2":
+        time_cost, memory_cost, parallelism = (int(p) for p in parts[1:4])
+        return {
+            "schemes": ["argon2"], "argon2_time_cost": time_cost,
+            "argon2_memory_cost": memory_cost, "argon2_parallelism": parallelism,
+        }
+    raise ValueError(f"Unknown scheme in {spec!r}")
+
+def measure(options: dict, seconds: float) -> float:
+    context = build_context(**options)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        context.hash("benchmark-password")
+        count += 1
+    return count / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Password hashes per second per core for candidate settings")
+    parser.add_argument("--candidates", default=DEFAULT_CANDIDATES,
+                        help="bcrypt:<rounds> or argon2:<time_cost>:<memory_kib>:<parallelism>, comma-separated")
+    parser.add_argument("--seconds", type=float, default=3, help="measurement time per candidate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="parallel processes, to see how throughput scales across cores")
+    args = parser.parse_args()
+
+    print(f"{'candidate':<24}{'hash ms':>10}{'hashes/s/core':>16}{f'hashes/s x{args.workers}':>18}")
+    for spec in args.candidates.split(","):
+        try:
+            options = parse_candidate(spec)
+            per_core = measure(options, args.seconds)
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                total = sum(pool.map(measure, [options] * args.workers, [args.seconds] * args.workers))
+        except Exception as e:
+            print(f"{spec:<24}  skipped: {e}")
+            continue
+        print(f"{spec:<24}{1000 / per_core:>10.1f}{per_core:>16.1f}{total:>18.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def worker(client: httpx.AsyncClient, headers: dict, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/mock/products", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        token = await login(client, args.email, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, headers, deadline, latencies, errors) for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(f"GET /mock/products, {args.concurrency} concurrent clients, {elapsed:.1f}s")
+    print(f"requests: {len(latencies)}  errors: {len(errors)}  rps: {len(latencies) / elapsed:.1f}")
+    print(f"p50: {statistics.median(latencies):.1f}ms  "
+          f"p95: {percentile(latencies, 95):.1f}ms  p99: {percentile(latencies, 99):.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for GET /mock/products")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Проверяет блокировку входа в MemoryBackend: лимитеры с разными окнами делят один backend,
+# и очистка, вызванная одним из них, не должна сбрасывать счётчики другого. Код выхода 1 при ошибке
+def is_locked(limiter, key) -> bool:
+    from fastapi import HTTPException
+
+    try:
+        limiter.check(key)
+    except HTTPException:
+        return True
+    return False
+
+def checks():
+    from app.rate_limit import MemoryBackend, RateLimiter
+
+    backend = MemoryBackend(sweep_every=10)
+    ip_limiter = RateLimiter(backend, "login_ip", 1000, 60)
+    failure_limiter = RateLimiter(backend, "login_email_ip", 5, 900)
+    key = "user@example.com|10.0.0.1"
+    started = 900 * 1000 + 10
+
+    with mock.patch("time.time", return_value=started):
+        for _ in range(5):
+            failure_limiter.record(key)
+        yield "locked after max failures", is_locked(failure_limiter, key)
+
+    # Окно login_ip за это время сменилось пять раз, окно блокировки ещё нет
+    with mock.patch("time.time", return_value=started + 300):
+        for i in range(20):
+            ip_limiter.hit(f"10.0.1.{i}")
+        yield "lockout survives other limiter's sweep", is_locked(failure_limiter, key)
+
+    with mock.patch("time.time", return_value=started + 1800):
+        for _ in range(10):
+            ip_limiter.hit("10.0.1.1")
+        yield "expired lockout counter is swept", f"login_email_ip:{key}" not in backend._counters
+
+def main():
+    failed = 0
+    for name, ok in checks():
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
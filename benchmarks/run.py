@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SCENARIOS = ["login", "users_me", "products_list", "products_crud", "admin_roles", "admin_access_rules"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark for auth and authorization hot paths")
+    parser.add_argument("--database", help="SQLAlchemy URL; by default a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--elements", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default="bench_report.json")
+    return parser.parse_args()
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def start_server(app, port):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+async def login(client, email, password):
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def build_scenarios(admin_headers, user_headers, users):
+    from benchmarks.seed import BENCH_PASSWORD, bench_email
+
+    emails = itertools.cycle(bench_email(i) for i in range(max(users, 1)))
+    product_ids = itertools.count(10_000_000)
+
+    async def scenario_login(client):
+        return [await client.post("/auth/login", json={"email": next(emails), "password": BENCH_PASSWORD})]
+
+    async def scenario_users_me(client):
+        return [await client.get("/users/me", headers=user_headers)]
+
+    async def scenario_products_list(client):
+        return [await client.get("/mock/products", headers=user_headers)]
+
+    async def scenario_products_crud(client):
+        product_id = next(product_ids)
+        body = {"id": product_id, "name": "bench", "owner_id": 0}
+        return [
+            await client.post("/mock/products", headers=user_headers, json=body),
+            await client.put(f"/mock/products/{product_id}", headers=user_headers, json={**body, "name": "bench2"}),
+            await client.delete(f"/mock/products/{product_id}", headers=user_headers),
+        ]
+
+    async def scenario_admin_roles(client):
+        return [await client.get("/admin/roles", headers=admin_headers)]
+
+    async def scenario_admin_access_rules(client):
+        return [await client.get("/admin/access-rules", headers=admin_headers)]
+
+    return {
+        "login": scenario_login,
+        "users_me": scenario_users_me,
+        "products_list": scenario_products_list,
+        "products_crud": scenario_products_crud,
+        "admin_roles": scenario_admin_roles,
+        "admin_access_rules": scenario_admin_access_rules,
+    }
+
+async def run_scenario(client, step, concurrency, duration, counter):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            responses = await step(client)
+            elapsed = (time.perf_counter() - start) * 1000
+            for response in responses:
+                latencies.append(elapsed / len(responses))
+                if response.status_code >= 400:
+                    errors += 1
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    queries = counter.count - queries_before
+
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+        },
+        "queries_per_request": round(queries / len(latencies), 2),
+    }
+
+async def run_all(args, counter):
+    import httpx
+    from benchmarks.seed import BENCH_PASSWORD, bench_email
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=120) as client:
+        admin_headers = await login(client, "admin@example.com", "admin123")
+        user_headers = await login(client, bench_email(0), BENCH_PASSWORD)
+        scenarios = build_scenarios(admin_headers, user_headers, args.users)
+
+        results = {}
+        for name in args.scenarios.split(","):
+            print(f"running {name}...", flush=True)
+            results[name] = await run_scenario(client, scenarios[name], args.concurrency, args.duration, counter)
+        return results
+
+def main():
+    args = parse_args()
+    database = args.database
+    if not database:
+        database = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.sqlite'}"
+    os.environ["DATABASE"] = database
+    # Все запросы идут с 127.0.0.1 — лимит по IP исказил бы сценарий login
+    os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "0")
+
+    from benchmarks.seed import seed
+    from app.database import engine
+    from app.main import app
+
+    print(f"seeding {args.users} users, {args.elements} elements...", flush=True)
+    seed(args.users, args.elements)
+
+    counter = QueryCounter(engine)
+    server, thread = start_server(app, args.port)
+    try:
+        results = asyncio.run(run_all(args, counter))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "params": {
+            "users": args.users, "elements": args.elements,
+            "concurrency": args.concurrency, "duration": args.duration,
+        },
+        "scenarios": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(json.dumps(report["scenarios"], indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app import bulk, models, schemas
+from app.auth import get_password_hash
+from app.init_db import init_db, SessionLocal
+
+BENCH_PASSWORD = "bench123"
+
+def bench_email(index: int) -> str:
+    return f"bench{index}@example.com"
+
+def seed(users: int, elements: int, batch_size: int = 5000):
+    init_db()
+    db: Session = SessionLocal()
+    try:
+        extra_elements = bulk.upsert_business_elements(db, [
+            schemas.BusinessElementCreate(name=f"bench_element_{i}", description="Benchmark element")
+            for i in range(elements)
+        ])
+        role_ids = [role_id for (role_id,) in db.query(models.Role.id).order_by(models.Role.id).all()]
+        bulk.upsert_access_rules(db, [
+            schemas.AccessRuleCreate(
+                role_id=role_id, business_element_id=element.id,
+                read_permission=True, read_all_permission=True, create_permission=True,
+                update_permission=True, delete_permission=True
+            )
+            for role_id in role_ids for element in extra_elements
+        ])
+
+        # Один хэш на всех: посев не должен упираться в bcrypt
+        hashed_password = get_password_hash(BENCH_PASSWORD)
+        user_role_id = db.query(models.Role.id).filter(models.Role.name == "user").scalar()
+        existing = {email for (email,) in db.query(models.User.email).filter(models.User.email.like("bench%")).all()}
+        rows = [
+            dict(
+                email=bench_email(i), hashed_password=hashed_password,
+                first_name="Bench", last_name=str(i), role_id=user_role_id, is_active=True, token_version=0
+            )
+            for i in range(users) if bench_email(i) not in existing
+        ]
+        for start in range(0, len(rows), batch_size):
+            db.execute(insert(models.User), rows[start:start + batch_size])
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Выполняется в свежем интерпретаторе: импорт приложения и полный цикл lifespan, как у нового воркера
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app, _startup
+
+async def run():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready
+
+ready = asyncio.run(run())
+print(json.dumps({"import": _startup["import"], "ready": ready - started}))
+"""
+
+def measure_once(env: dict) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start time of a worker: import + lifespan warm-up")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database", help="database URL (default: temporary SQLite with migrations applied)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PASSWORD_HASH_WORKERS=os.environ.get("PASSWORD_HASH_WORKERS", "0"))
+    if args.database:
+        env["DATABASE"] = args.database
+    else:
+        env["DATABASE"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'startup.sqlite'}"
+        subprocess.run(
+            [sys.executable, "-c", "from app.init_db import run_migrations; run_migrations()"],
+            cwd=ROOT, env=env, check=True, capture_output=True
+        )
+
+    runs = [measure_once(env) for _ in range(args.runs)]
+    print(f"{'stage':<28}{'median ms':>12}{'max ms':>10}")
+    for key, label in (("import", "import app.main"), ("ready", "import + warm-up"), ("process", "process start to exit")):
+        values = [run[key] * 1000 for run in runs]
+        print(f"{label:<28}{statistics.median(values):>12.1f}{max(values):>10.1f}")
+
+if __name__ == "__main__":
+    main()
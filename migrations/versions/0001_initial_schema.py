@@ -0,0 +1,67 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 19:54:31.024155
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Схема ровно такая, какую создавал create_all до перехода на миграции,
+# поэтому такие базы принимаются командой `alembic stamp 0001`
+def upgrade():
+    op.create_table(
+        "roles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), unique=True),
+        sa.Column("description", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_roles_id", "roles", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("first_name", sa.String()),
+        sa.Column("last_name", sa.String()),
+        sa.Column("middle_name", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("role_id", sa.Integer(), sa.ForeignKey("roles.id")),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "business_elements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), unique=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_business_elements_id", "business_elements", ["id"])
+
+    op.create_table(
+        "access_role_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("role_id", sa.Integer(), sa.ForeignKey("roles.id")),
+        sa.Column("business_element_id", sa.Integer(), sa.ForeignKey("business_elements.id")),
+        sa.Column("read_permission", sa.Boolean()),
+        sa.Column("read_all_permission", sa.Boolean()),
+        sa.Column("create_permission", sa.Boolean()),
+        sa.Column("update_permission", sa.Boolean()),
+        sa.Column("update_all_permission", sa.Boolean()),
+        sa.Column("delete_permission", sa.Boolean()),
+        sa.Column("delete_all_permission", sa.Boolean()),
+    )
+    op.create_index("ix_access_role_rules_id", "access_role_rules", ["id"])
+
+def downgrade():
+    for table in ("access_role_rules", "business_elements", "users", "roles"):
+        op.drop_table(table)
@@ -0,0 +1,80 @@
+"""token_version, mock tables and token tables
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-19 10:12:40.318276
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# До перехода на миграции эти изменения попадали в базу через create_all — новые таблицы создавались,
+# а существующие не менялись. Поэтому у базы, помеченной `stamp 0001`, может быть любая их часть:
+# создаётся только то, чего нет
+def _existing(inspector):
+    if inspector is None:
+        return set(), set(), set()
+    tables = set(inspector.get_table_names())
+    columns = {(table, column["name"]) for table in tables for column in inspector.get_columns(table)}
+    indexes = {index["name"] for table in tables for index in inspector.get_indexes(table)}
+    return tables, columns, indexes
+
+def upgrade():
+    inspector = None if op.get_context().as_sql else sa.inspect(op.get_bind())
+    tables, columns, indexes = _existing(inspector)
+
+    if ("users", "token_version") not in columns:
+        op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+    new_tables = {
+        "products": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        ],
+        "orders": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("product_id", sa.Integer()),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        ],
+        "refresh_tokens": [
+            sa.Column("jti", sa.String(), primary_key=True),
+            sa.Column("family_id", sa.String()),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("expires_at", sa.DateTime()),
+            sa.Column("revoked_at", sa.DateTime(), nullable=True),
+            sa.Column("replaced_by", sa.String(), nullable=True),
+        ],
+        "revoked_tokens": [
+            sa.Column("jti", sa.String(), primary_key=True),
+            sa.Column("expires_at", sa.DateTime()),
+            sa.Column("revoked_at", sa.DateTime()),
+        ],
+    }
+    for table, table_columns in new_tables.items():
+        if table not in tables:
+            op.create_table(table, *table_columns)
+
+    new_indexes = [
+        ("ix_products_id", "products", "id"),
+        ("ix_products_owner_id", "products", "owner_id"),
+        ("ix_orders_id", "orders", "id"),
+        ("ix_orders_product_id", "orders", "product_id"),
+        ("ix_orders_user_id", "orders", "user_id"),
+        ("ix_refresh_tokens_family_id", "refresh_tokens", "family_id"),
+        ("ix_refresh_tokens_user_id", "refresh_tokens", "user_id"),
+        ("ix_revoked_tokens_expires_at", "revoked_tokens", "expires_at"),
+        ("ix_revoked_tokens_revoked_at", "revoked_tokens", "revoked_at"),
+    ]
+    for name, table, column in new_indexes:
+        if name not in indexes:
+            op.create_index(name, table, [column])
+
+def downgrade():
+    for table in ("revoked_tokens", "refresh_tokens", "orders", "products"):
+        op.drop_table(table)
+    op.drop_column("users", "token_version")
@@ -0,0 +1,75 @@
+"""lookup indexes and unique access rules
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 20:10:12.418305
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+RULE_FIELDS = [
+    "read_permission", "read_all_permission", "create_permission",
+    "update_permission", "update_all_permission", "delete_permission", "delete_all_permission",
+]
+
+def _dedup_access_rules(connection):
+    # Матрица прав уже объединяет дубли через OR, поэтому слияние в одну строку
+    # с OR флагов не меняет действующие права. Остаётся правило с наименьшим id
+    rules = sa.table("access_role_rules", sa.column("id"), sa.column("role_id"),
+                     sa.column("business_element_id"), *(sa.column(field) for field in RULE_FIELDS))
+    duplicated = connection.execute(
+        sa.select(rules.c.role_id, rules.c.business_element_id)
+        .group_by(rules.c.role_id, rules.c.business_element_id)
+        .having(sa.func.count() > 1)
+    ).all()
+
+    for role_id, element_id in duplicated:
+        rows = connection.execute(
+            sa.select(rules).where(rules.c.role_id == role_id, rules.c.business_element_id == element_id)
+            .order_by(rules.c.id)
+        ).mappings().all()
+        keep, *extra = rows
+        merged = {field: any(row[field] for row in rows) for field in RULE_FIELDS}
+        connection.execute(rules.update().where(rules.c.id == keep["id"]).values(**merged))
+        connection.execute(rules.delete().where(rules.c.id.in_([row["id"] for row in extra])))
+
+def _check_email_case_duplicates(connection):
+    # Аккаунты с email, различающимся только регистром, автоматически не сливаем
+    duplicated = connection.execute(sa.text(
+        "SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1"
+    )).scalars().all()
+    if duplicated:
+        raise RuntimeError(
+            "Users with emails differing only in case must be resolved before this migration: "
+            + ", ".join(duplicated[:20])
+        )
+
+def upgrade():
+    if not op.get_context().as_sql:
+        connection = op.get_bind()
+        _dedup_access_rules(connection)
+        _check_email_case_duplicates(connection)
+    op.create_index(
+        "uq_access_role_rules_role_element", "access_role_rules", ["role_id", "business_element_id"], unique=True
+    )
+
+    # Большие таблицы индексируются без блокировки записи (CONCURRENTLY нельзя внутри транзакции)
+    with op.get_context().autocommit_block():
+        op.create_index("ix_users_role_id", "users", ["role_id"], postgresql_concurrently=True)
+        op.create_index("ix_users_email_lower", "users", [sa.text("lower(email)")], unique=True,
+                        postgresql_concurrently=True)
+        op.create_index("ix_business_elements_owner_id", "business_elements", ["owner_id"],
+                        postgresql_concurrently=True)
+    op.drop_index("ix_users_email", table_name="users")
+
+def downgrade():
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.drop_index("ix_business_elements_owner_id", table_name="business_elements")
+    op.drop_index("ix_users_email_lower", table_name="users")
+    op.drop_index("ix_users_role_id", table_name="users")
+    op.drop_index("uq_access_role_rules_role_element", table_name="access_role_rules")
@@ -0,0 +1,35 @@
+"""audit events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 21:02:47.193820
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # actor_id без внешнего ключа: журнал не должен зависеть от судьбы пользователя и тормозить вставку
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column("subject", sa.String(), nullable=True),
+        sa.Column("ip", sa.String(), nullable=True),
+        sa.Column("details", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_audit_events_created_at", "audit_events", ["created_at"])
+    op.create_index("ix_audit_events_action", "audit_events", ["action"])
+    op.create_index("ix_audit_events_actor_id", "audit_events", ["actor_id"])
+
+def downgrade():
+    op.drop_index("ix_audit_events_actor_id", table_name="audit_events")
+    op.drop_index("ix_audit_events_action", table_name="audit_events")
+    op.drop_index("ix_audit_events_created_at", table_name="audit_events")
+    op.drop_table("audit_events")
@@ -0,0 +1,27 @@
+"""updated_at for users, roles and access rules
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 21:37:05.562913
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    for table in ("users", "roles", "access_role_rules"):
+        op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=True))
+    # Существующим строкам нужна любая непустая отметка: от неё считаются ETag
+    op.execute("UPDATE users SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE roles SET updated_at = CURRENT_TIMESTAMP")
+    op.execute("UPDATE access_role_rules SET updated_at = CURRENT_TIMESTAMP")
+
+def downgrade():
+    # Без batch-режима: пересоздание users в SQLite потеряло бы функциональный индекс по lower(email).
+    # ALTER TABLE DROP COLUMN поддерживается SQLite начиная с 3.35
+    for table in ("access_role_rules", "roles", "users"):
+        op.drop_column(table, "updated_at")
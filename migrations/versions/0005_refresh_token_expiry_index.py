@@ -0,0 +1,20 @@
+"""index refresh_tokens.expires_at for pruning
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:03:26.745190
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"],
+                        postgresql_concurrently=True)
+
+def downgrade():
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")